@@ -46,6 +46,11 @@ login_manager.login_message = 'Please log in to access this page.'
 # Initialize CSRF Protection
 csrf = CSRFProtect(app)
 
+# Close pooled database connections when the process exits
+import atexit
+from src.data_access.database import close_all_connections
+atexit.register(close_all_connections)
+
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
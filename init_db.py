@@ -33,6 +33,7 @@ def init_database():
             deleted_by INTEGER
         )
     """)
+    _create_user_search_index(cursor)
     
     # Create resources table
     cursor.execute("""
@@ -94,19 +95,10 @@ def init_database():
             FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
         )
     """)
+    _add_message_pair_columns(cursor)
     
     # Create thread_read table for tracking thread-level read/unread status
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS thread_read (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            thread_id INTEGER NOT NULL,
-            is_read BOOLEAN DEFAULT 0,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(user_id),
-            UNIQUE(user_id, thread_id)
-        )
-    """)
+    _create_thread_read_table(cursor)
     
     # Create reviews table
     cursor.execute("""
@@ -149,13 +141,31 @@ def init_database():
         "CREATE INDEX IF NOT EXISTS idx_bookings_resource ON bookings(resource_id)",
         "CREATE INDEX IF NOT EXISTS idx_bookings_requester ON bookings(requester_id)",
         "CREATE INDEX IF NOT EXISTS idx_bookings_datetime ON bookings(start_datetime, end_datetime)",
-        "CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages(thread_id)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_conflict ON bookings(resource_id, status, start_datetime, end_datetime)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_status_end ON bookings(status, end_datetime)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_requester_start ON bookings(requester_id, start_datetime)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_thread_deleted_ts ON messages(thread_id, deleted, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id, deleted, resource_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver_id, deleted, resource_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_pair ON messages(user_a_id, user_b_id, resource_id, deleted, timestamp)",
         "CREATE INDEX IF NOT EXISTS idx_reviews_resource ON reviews(resource_id)",
         "CREATE INDEX IF NOT EXISTS idx_reviews_reviewer ON reviews(reviewer_id)"
     ]
     
     for index_sql in indexes:
         cursor.execute(index_sql)
+    # Redundant with the table-wide UNIQUE on users.email (soft delete clears the email)
+    cursor.execute("DROP INDEX IF EXISTS ux_users_email_active")
+    # Superseded by idx_messages_thread_deleted_ts (same leading column)
+    cursor.execute("DROP INDEX IF EXISTS idx_messages_thread")
+    # Superseded by the thread_read primary key, which now holds the whole row
+    cursor.execute("DROP INDEX IF EXISTS idx_thread_read_user")
+    
+    # Re-key messages stored under thread IDs from the old per-process hash()
+    _backfill_thread_ids(cursor)
+    
+    # Refresh planner statistics so the OR'd sender/receiver filters use the indexes above
+    cursor.execute("ANALYZE")
     
     # Create default admin user if it doesn't exist
     admin_email = 'admin@iu.edu'
@@ -177,6 +187,108 @@ def init_database():
     print(f"  Email: {admin_email}")
     print(f"  Password: {admin_password}")
 
+def _create_user_search_index(cursor):
+    """
+    Create the users_fts substring index over user names and emails (also on existing databases).
+    
+    The trigram tokenizer matches any substring of 3+ characters, like LIKE '%q%',
+    without scanning users. Triggers keep it in sync with the users table.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'")
+    exists = cursor.fetchone() is not None
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+            name, email, content='users', content_rowid='user_id', tokenize='trigram'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts (rowid, name, email) VALUES (new.user_id, new.name, new.email);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, name, email) VALUES ('delete', old.user_id, old.name, old.email);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name, email ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, name, email) VALUES ('delete', old.user_id, old.name, old.email);
+            INSERT INTO users_fts (rowid, name, email) VALUES (new.user_id, new.name, new.email);
+        END
+    """)
+    if not exists:
+        # Index users created before the search index existed
+        cursor.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+_THREAD_READ_DDL = """
+    CREATE TABLE IF NOT EXISTS thread_read (
+        user_id INTEGER NOT NULL,
+        thread_id INTEGER NOT NULL,
+        is_read BOOLEAN DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, thread_id),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    ) WITHOUT ROWID
+"""
+
+def _create_thread_read_table(cursor):
+    """
+    Create thread_read keyed by (user_id, thread_id), rebuilding older rowid tables.
+    
+    As a WITHOUT ROWID table the rows are stored in the primary key B-tree, so each
+    read-status lookup or upsert touches one B-tree instead of a table and an index.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'thread_read'")
+    row = cursor.fetchone()
+    if row is not None and 'WITHOUT ROWID' not in row[0].upper():
+        cursor.execute("ALTER TABLE thread_read RENAME TO thread_read_old")
+        cursor.execute(_THREAD_READ_DDL)
+        cursor.execute("""
+            INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
+            SELECT user_id, thread_id, is_read, updated_at FROM thread_read_old
+        """)
+        cursor.execute("DROP TABLE thread_read_old")
+    else:
+        cursor.execute(_THREAD_READ_DDL)
+
+def _add_message_pair_columns(cursor):
+    """
+    Add the order-independent participant pair to messages (also on existing databases).
+    
+    user_a_id/user_b_id are the smaller/larger of sender_id and receiver_id, so a
+    conversation is matched with two equalities instead of OR'd sender/receiver tests.
+    """
+    cursor.execute("PRAGMA table_xinfo(messages)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if 'user_a_id' not in columns:
+        cursor.execute("ALTER TABLE messages ADD COLUMN user_a_id INTEGER GENERATED ALWAYS AS (MIN(sender_id, receiver_id)) VIRTUAL")
+    if 'user_b_id' not in columns:
+        cursor.execute("ALTER TABLE messages ADD COLUMN user_b_id INTEGER GENERATED ALWAYS AS (MAX(sender_id, receiver_id)) VIRTUAL")
+
+def _backfill_thread_ids(cursor):
+    """Move messages and thread read status onto deterministic thread IDs."""
+    from src.services.messaging_service import generate_thread_id
+    
+    cursor.execute("SELECT DISTINCT thread_id, sender_id, receiver_id, resource_id FROM messages")
+    remap = {}
+    for old_id, sender_id, receiver_id, resource_id in cursor.fetchall():
+        new_id = generate_thread_id(sender_id, receiver_id, resource_id)
+        if new_id != old_id:
+            remap[old_id] = new_id
+    
+    for old_id, new_id in remap.items():
+        cursor.execute("UPDATE messages SET thread_id = ? WHERE thread_id = ?", (new_id, old_id))
+        # Merge read status into the new ID; a thread stays unread if any old ID was unread
+        cursor.execute("""
+            INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
+            SELECT user_id, ?, is_read, updated_at FROM thread_read WHERE thread_id = ?
+            ON CONFLICT(user_id, thread_id) DO UPDATE SET
+                is_read = MIN(is_read, excluded.is_read),
+                updated_at = MAX(updated_at, excluded.updated_at)
+        """, (new_id, old_id))
+        cursor.execute("DELETE FROM thread_read WHERE thread_id = ?", (old_id,))
+
 if __name__ == '__main__':
     init_database()
 
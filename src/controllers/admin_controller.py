@@ -8,7 +8,7 @@ from src.services.admin_service import (
     change_user_role, delete_user, get_admin_logs, get_user, update_user, restore_user, get_deleted_users
 )
 from src.services.resource_service import list_resources, update_resource, get_resource, reassign_resource_ownership
-from src.services.booking_service import list_bookings, get_booking, update_booking, update_booking_status, check_conflicts
+from src.services.booking_service import list_bookings, get_booking, update_booking, update_booking_status, has_conflict
 from src.services.messaging_service import get_deleted_threads, restore_thread, send_message
 from src.utils.decorators import admin_required
 from src.utils.controller_helpers import categorize_bookings, log_admin_action, parse_bool_filter
@@ -957,8 +957,7 @@ def approve_booking_admin(booking_id):
     resource = resource_result['data']
     
     # Check for conflicts before approving
-    conflicts = check_conflicts(booking['resource_id'], booking['start_datetime'], booking['end_datetime'], exclude_booking_id=booking_id)
-    if conflicts:
+    if has_conflict(booking['resource_id'], booking['start_datetime'], booking['end_datetime'], exclude_booking_id=booking_id):
         flash('Cannot approve: This time slot conflicts with an existing approved booking.', 'error')
         return redirect(url_for('admin.bookings'))
     
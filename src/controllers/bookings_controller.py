@@ -3,7 +3,7 @@ Bookings controller (Flask blueprint).
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, Response
 from flask_login import login_required, current_user
-from src.services.booking_service import create_booking, get_booking, update_booking_status, list_bookings, check_conflicts
+from src.services.booking_service import create_booking, get_booking, update_booking_status, list_bookings, check_conflicts, has_conflict
 from src.services.resource_service import get_resource
 from src.utils.datetime_utils import parse_datetime_aware
 from src.utils.controller_helpers import categorize_bookings
@@ -256,8 +256,7 @@ def approve(booking_id):
         return redirect(request.referrer or url_for('bookings.index'))
     
     # Check for conflicts before approving
-    conflicts = check_conflicts(booking['resource_id'], booking['start_datetime'], booking['end_datetime'], exclude_booking_id=booking_id)
-    if conflicts:
+    if has_conflict(booking['resource_id'], booking['start_datetime'], booking['end_datetime'], exclude_booking_id=booking_id):
         flash('Cannot approve: This time slot conflicts with an existing approved booking.', 'error')
         return redirect(request.referrer or url_for('bookings.index'))
     
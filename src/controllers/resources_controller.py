@@ -5,7 +5,6 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from src.services.resource_service import create_resource, get_resource, update_resource, delete_resource, list_resources, convert_12_to_24_hour, convert_24_to_12_hour
 from src.services.review_service import get_resource_reviews
-from src.services.booking_service import list_bookings
 from src.services.calendar_service import prepare_calendar_data
 from src.utils.controller_helpers import (
     check_resource_permission,
@@ -61,17 +60,10 @@ def detail(resource_id):
     selected_month = request.args.get('month', today.month, type=int)
     selected_day = request.args.get('day', type=int)  # Optional - if provided, show day view
     
-    # Fetch approved bookings for the resource schedule
-    approved_bookings_result = list_bookings(resource_id=resource_id, status='approved', limit=500, offset=0)
-    
-    all_bookings_raw = []
-    if approved_bookings_result['success']:
-        all_bookings_raw.extend(approved_bookings_result['data']['bookings'])
-    
-    # Prepare calendar data using service
+    # Prepare calendar data using service (fetches only the displayed range's approved bookings)
     calendar_info = prepare_calendar_data(
         resource_id=resource_id,
-        approved_bookings_raw=all_bookings_raw,
+        approved_bookings_raw=None,
         selected_year=selected_year,
         selected_month=selected_month,
         selected_day=selected_day
@@ -3,22 +3,134 @@ Database access layer with connection management.
 All database operations should go through this module.
 """
 from contextlib import contextmanager
+import queue
 import sqlite3
+import threading
 import os
 from src.utils.logging_config import get_logger
 from src.utils.exceptions import DatabaseError
 
 logger = get_logger(__name__)
 
+# Idle connections kept per database file
+_POOL_SIZE = 5
+
+# Milliseconds a connection waits on a locked database before failing
+_BUSY_TIMEOUT_MS = 5000
+
+# Prepared statements kept per connection, keyed by SQL text. Pooled connections
+# serve every service, so the default of 128 would evict hot statements.
+_STATEMENT_CACHE_SIZE = 256
+
+# Applied once to every new connection. WAL lets readers proceed while a
+# booking is being written; the rest trade durability on power loss for
+# fewer fsyncs and keep hot pages in memory. busy_timeout makes concurrent
+# writers queue for the lock instead of failing with "database is locked".
+# The bundled campus_resource_hub.db is stored in WAL mode already, so opening
+# it does not rewrite its header.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+    f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}",
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Write counter per database file, for caches of data assembled from several
+# tables (e.g. concierge responses). Services bump it after committing writes.
+_data_versions = {}
+_data_versions_lock = threading.Lock()
+
 def get_database_path():
     """Get database path from environment variable (read dynamically)."""
     return os.environ.get('DATABASE_PATH', 'campus_resource_hub.db')
 
+def bump_data_version():
+    """Record that the current database's resources, bookings, reviews or users changed."""
+    db_path = get_database_path()
+    with _data_versions_lock:
+        _data_versions[db_path] = _data_versions.get(db_path, 0) + 1
+
+def get_data_version():
+    """Token that changes whenever bump_data_version() is called for the current database."""
+    with _data_versions_lock:
+        return _data_versions.get(get_database_path(), 0)
+
+def _get_pool(db_path):
+    """Return the idle-connection queue for a database file."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_path, queue.LifoQueue(maxsize=_POOL_SIZE))
+    return pool
+
+def _file_id(db_path):
+    """Identify the file behind a path so recreated databases are not reused."""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+def _open_connection(db_path):
+    """Open and configure a new connection."""
+    conn = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                           cached_statements=_STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row  # Return dict-like rows
+    try:
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn, _file_id(db_path)
+
+def _checkout_connection(db_path):
+    """Take an idle connection from the pool, or open a new one."""
+    pool = _get_pool(db_path)
+    current_id = _file_id(db_path)
+    while True:
+        try:
+            conn, file_id = pool.get_nowait()
+        except queue.Empty:
+            return _open_connection(db_path)
+        if file_id is not None and file_id == current_id:
+            return conn, file_id
+        # The file was deleted or replaced since this connection was opened
+        conn.close()
+
+def _release_connection(db_path, conn, file_id):
+    """Return a connection to the pool, closing it if the pool is full."""
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        _get_pool(db_path).put_nowait((conn, file_id))
+    except (queue.Full, sqlite3.Error):
+        conn.close()
+
+def close_all_connections():
+    """Close every pooled connection (e.g., before deleting a database file)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                conn, _ = pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
 @contextmanager
 def get_db_connection():
     """
     Context manager for database connections.
     Ensures proper transaction handling and connection cleanup.
+    Connections are reused from a small per-database pool.
     
     Usage:
         with get_db_connection() as conn:
@@ -31,8 +143,7 @@ def get_db_connection():
     """
     db_path = get_database_path()
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Return dict-like rows
+        conn, file_id = _checkout_connection(db_path)
     except sqlite3.Error as e:
         logger.error(f"Failed to connect to database at {db_path}: {e}")
         raise DatabaseError(f"Database connection failed: {e}") from e
@@ -49,5 +160,5 @@ def get_db_connection():
         conn.rollback()
         raise DatabaseError(f"Unexpected database error: {e}") from e
     finally:
-        conn.close()
+        _release_connection(db_path, conn, file_id)
 
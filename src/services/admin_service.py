@@ -1,7 +1,7 @@
 """
 Admin service for user management and statistics.
 """
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, bump_data_version
 
 def get_statistics(category_filter=None, location_filter=None, featured_filter=None, sort_by='booking_count', sort_order='desc'):
     """Get system statistics for admin dashboard."""
@@ -368,6 +368,10 @@ def delete_user(user_id, admin_id):
         
         conn.commit()
     
+    # Cancelled bookings may span any resource
+    from src.services.booking_service import bump_booking_version
+    bump_booking_version()
+    
     return {'success': True, 'data': {'user_id': user_id}}
 
 def get_user(user_id):
@@ -448,6 +452,8 @@ def restore_user(user_id, admin_id):
         
         conn.commit()
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'user_id': user_id}}
 
 def update_user(user_id, admin_id, name=None, email=None, password=None, role=None, 
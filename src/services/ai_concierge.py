@@ -3,12 +3,16 @@ AI Resource Concierge service.
 Provides natural language interface for resource discovery using Google Gemini AI.
 """
 import os
+import re
 import json
+import copy
+import time
+import threading
 from src.services.search_service import search_resources
-from src.services.review_service import get_resource_reviews
+from src.services.review_service import get_average_ratings
 from src.services.resource_service import get_resource, list_resources
 from src.services.booking_service import check_conflicts
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, get_database_path, get_data_version
 from src.utils.logging_config import get_logger
 from datetime import datetime, timedelta
 from dateutil.tz import gettz, tzutc
@@ -23,6 +27,72 @@ except ImportError:
     GEMINI_AVAILABLE = False
     genai = None
 
+# Short-lived cache of assembled concierge responses, keyed by (database path, data version,
+# normalized query). Repeated prompts (help, "tell me about X", common searches) skip the
+# search and review enrichment; any resource, booking, review or user write changes the key.
+_RESPONSE_CACHE_TTL_SECONDS = 30
+_RESPONSE_CACHE_MAX_ENTRIES = 512
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+def _response_cache_key(user_query):
+    """Build the response cache key for a user query."""
+    return (get_database_path(), get_data_version(), ' '.join(user_query.lower().split()))
+
+def _get_cached_response(key):
+    """Return a copy of a cached response, or None if missing or expired."""
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del _response_cache[key]
+            return None
+    return copy.deepcopy(response)
+
+def _store_cached_response(key, response):
+    """Store a copy of a successful response in the cache."""
+    if not response.get('success'):
+        return
+    with _response_cache_lock:
+        if len(_response_cache) >= _RESPONSE_CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest if still full
+            now = time.monotonic()
+            for stale_key in [k for k, (expires_at, _) in _response_cache.items() if expires_at < now]:
+                del _response_cache[stale_key]
+            if len(_response_cache) >= _RESPONSE_CACHE_MAX_ENTRIES:
+                del _response_cache[next(iter(_response_cache))]
+        _response_cache[key] = (time.monotonic() + _RESPONSE_CACHE_TTL_SECONDS, copy.deepcopy(response))
+
+# Keywords for each query intent, matched as substrings of the lowercased query
+_INTENT_KEYWORDS = {
+    'help': ('help', 'what can you do', 'how can you help', 'what do you do', 'assist', 'support'),
+    'stats': ('how many', 'total', 'count', 'statistics', 'stats', 'number of'),
+    'largest': ('largest', 'biggest', 'maximum capacity', 'max capacity', 'highest capacity', 'most capacity'),
+    'lookup': ('tell me about', 'about', 'details about', 'information about', 'what is', 'describe'),
+    'category': ('study rooms', 'lab equipment', 'av equipment', 'event spaces', 'tutoring', 'all study rooms', 'all event spaces'),
+    'location': ('at', 'near', 'in', 'located at', 'resources at', 'resources in', 'resources near'),
+    'top_rated': ('best', 'top rated', 'highest rated', 'most rated', 'top', 'best rated', 'highly rated'),
+    'availability': ('available', 'availability', 'is available', 'when available', 'free', 'booked', 'when can i book'),
+    'recent': ('new', 'recent', 'recently added', 'latest', 'newest', 'just added'),
+    'comparison': ('compare', 'difference', 'vs', 'versus', 'better', 'which is better'),
+    'search': ('find', 'search', 'looking for', 'need', 'want', 'show me', 'book', 'reserve',
+               'resource', 'what resources', 'list resources', 'show resources'),
+}
+
+# One compiled alternation per intent. Intents are not exclusive (a query can be
+# both a lookup and a search), so each is tested separately rather than through
+# a single pattern that could only report one of them.
+_INTENT_PATTERNS = {
+    intent: re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+    for intent, keywords in _INTENT_KEYWORDS.items()
+}
+
+def detect_intents(query_lower):
+    """Return the set of intents whose keywords appear in the lowercased query."""
+    return {intent for intent, pattern in _INTENT_PATTERNS.items() if pattern.search(query_lower)}
+
 def load_context_files():
     """
     Load context files from /docs/context/ directory.
@@ -99,7 +169,6 @@ def parse_query(query):
             break
     
     # Extract capacity
-    import re
     capacity_min = None
     capacity_max = None
     
@@ -144,6 +213,23 @@ def parse_query(query):
         'capacity_max': capacity_max
     }
 
+def attach_ratings(resources):
+    """
+    Set 'rating' on resources that don't have one yet, using a single
+    batched review query instead of one lookup per resource.
+    """
+    missing = [r for r in resources if 'rating' not in r]
+    if not missing:
+        return resources
+    
+    result = get_average_ratings([r['resource_id'] for r in missing])
+    if result['success']:
+        ratings = result['data']['ratings']
+        for resource in missing:
+            if resource['resource_id'] in ratings:
+                resource['rating'] = ratings[resource['resource_id']]
+    return resources
+
 def get_database_statistics():
     """
     Get read-only statistics from the database for answering user questions.
@@ -186,6 +272,33 @@ def get_database_statistics():
     
     return stats
 
+def format_statistics_context(stats):
+    """
+    Format database statistics as bullet lines for the AI prompt.
+    Returns a single string built with one join rather than repeated concatenation.
+    """
+    lines = [
+        f"- Total published resources: {stats.get('total_resources', 0)}\n",
+        f"- Total bookings: {stats.get('total_bookings', 0)}\n",
+        f"- Featured resources: {stats.get('featured_resources', 0)}\n"
+    ]
+    if stats.get('resources_by_category'):
+        lines.append("- Resources by category:\n")
+        lines.extend(f"  * {cat.replace('_', ' ').title()}: {count}\n"
+                     for cat, count in stats['resources_by_category'].items())
+    return "".join(lines)
+
+def format_statistics_summary(stats):
+    """Format database statistics as a plain-text summary for fallback responses."""
+    lines = [f"""There are currently {stats.get('total_resources', 0)} published resources in the system.
+Total bookings made: {stats.get('total_bookings', 0)}
+Featured resources: {stats.get('featured_resources', 0)}"""]
+    if stats.get('resources_by_category'):
+        lines.append("\n\nResources by category:")
+        lines.extend(f"\n- {cat.replace('_', ' ').title()}: {count}"
+                     for cat, count in stats['resources_by_category'].items())
+    return "".join(lines)
+
 def get_largest_resource_by_capacity():
     """
     Get the resource(s) with the highest capacity.
@@ -278,6 +391,68 @@ def get_resource_by_name_or_id(query):
         logger.error(f"Error querying resource: {e}", exc_info=True)
         return []
 
+def get_resource_with_related(name_or_id, limit=4):
+    """
+    Fetch a resource by name or ID together with up to ``limit`` related resources.
+    The main resource is always first; related resources match the same keyword
+    in title or description. Average ratings are included in the same query.
+    Returns an empty list when no main resource matches.
+    """
+    resource_id = int(name_or_id) if name_or_id.isdigit() else None
+    pattern = f'%{name_or_id}%'
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                WITH main AS (
+                    SELECT resource_id
+                    FROM resources
+                    WHERE status = 'published'
+                      AND (resource_id = ? OR (? IS NULL AND LOWER(title) LIKE LOWER(?)))
+                    LIMIT 1
+                ),
+                matched AS (
+                    SELECT resource_id, 0 AS rank, NULL AS created_at FROM main
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT r.resource_id, 1 AS rank, r.created_at
+                        FROM resources r
+                        WHERE r.status = 'published'
+                          AND EXISTS (SELECT 1 FROM main)
+                          AND r.resource_id NOT IN (SELECT resource_id FROM main)
+                          AND (r.title LIKE ? OR r.description LIKE ?)
+                        ORDER BY r.created_at DESC
+                        LIMIT ?
+                    )
+                )
+                SELECT r.resource_id, r.title, r.description, r.category, r.location, r.capacity,
+                       (SELECT AVG(rev.rating) FROM reviews rev
+                        WHERE rev.resource_id = r.resource_id) AS avg_rating
+                FROM matched m
+                JOIN resources r ON r.resource_id = m.resource_id
+                ORDER BY m.rank, m.created_at DESC
+            """, (resource_id, resource_id, pattern, pattern, pattern, limit))
+            
+            resources = []
+            for row in cursor.fetchall():
+                resource = {
+                    'resource_id': row['resource_id'],
+                    'title': row['title'],
+                    'description': row['description'],
+                    'category': row['category'],
+                    'location': row['location'],
+                    'capacity': row['capacity']
+                }
+                if row['avg_rating']:
+                    resource['rating'] = float(row['avg_rating'])
+                resources.append(resource)
+            
+            return resources
+    except Exception as e:
+        logger.error(f"Error querying resource with related resources: {e}", exc_info=True)
+        return []
+
 def get_resources_by_category(category):
     """
     Get all resources in a specific category.
@@ -307,10 +482,7 @@ def get_resources_by_category(category):
         if result['success']:
             resources = result['data']['resources']
             # Enrich with reviews
-            for resource in resources:
-                reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                    resource['rating'] = reviews_result['data']['stats']['avg_rating']
+            attach_ratings(resources)
             return resources
         return []
     except Exception as e:
@@ -333,10 +505,7 @@ def get_resources_by_location(location_keyword):
         if search_result['success']:
             resources = search_result['data']['resources']
             # Enrich with reviews
-            for resource in resources:
-                reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                    resource['rating'] = reviews_result['data']['stats']['avg_rating']
+            attach_ratings(resources)
             return resources
         return []
     except Exception as e:
@@ -491,10 +660,7 @@ def get_recently_added_resources(limit=10):
         if result['success']:
             resources = result['data']['resources']
             # Enrich with reviews
-            for resource in resources:
-                reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                    resource['rating'] = reviews_result['data']['stats']['avg_rating']
+            attach_ratings(resources)
             return resources
         return []
     except Exception as e:
@@ -517,13 +683,7 @@ def compare_resources(resource_id_1, resource_id_2):
         res2 = resource2['data']
         
         # Get reviews for both
-        reviews1 = get_resource_reviews(resource_id_1, limit=1)
-        reviews2 = get_resource_reviews(resource_id_2, limit=1)
-        
-        if reviews1['success'] and reviews1['data']['stats']['avg_rating']:
-            res1['rating'] = reviews1['data']['stats']['avg_rating']
-        if reviews2['success'] and reviews2['data']['stats']['avg_rating']:
-            res2['rating'] = reviews2['data']['stats']['avg_rating']
+        attach_ratings([res1, res2])
         
         return {
             'resource1': res1,
@@ -575,24 +735,18 @@ def get_resource_context():
     # Build example resources text
     examples_text = ""
     if resource_examples:
-        examples_text = "\n\nExample resources in the system:\n"
+        lines = ["\n\nExample resources in the system:\n"]
         for ex in resource_examples:
             capacity_text = f", capacity: {ex['capacity']}" if ex['capacity'] != 'N/A' else ""
-            examples_text += f"- {ex['title']} ({ex['category']}) at {ex['location']}{capacity_text}\n"
+            lines.append(f"- {ex['title']} ({ex['category']}) at {ex['location']}{capacity_text}\n")
+        examples_text = "".join(lines)
     
     # Get database statistics for answering questions
     stats = get_database_statistics()
     stats_text = ""
     if stats:
-        stats_text = f"\nDatabase Statistics:\n"
-        stats_text += f"- Total published resources: {stats.get('total_resources', 0)}\n"
-        stats_text += f"- Total bookings: {stats.get('total_bookings', 0)}\n"
-        stats_text += f"- Featured resources: {stats.get('featured_resources', 0)}\n"
-        if stats.get('resources_by_category'):
-            stats_text += f"- Resources by category:\n"
-            for cat, count in stats['resources_by_category'].items():
-                stats_text += f"  * {cat.replace('_', ' ').title()}: {count}\n"
-    
+        stats_text = "\nDatabase Statistics:\n" + format_statistics_context(stats)
+
     context = f"""You are Crimson, an AI assistant EXCLUSIVELY for the Indiana University Campus Resource Hub. 
 
 STRICT TOPIC RESTRICTIONS:
@@ -639,7 +793,24 @@ def query_concierge(user_query, conversation_history=None):
     """
     Process natural language query using Google Gemini AI and return response.
     All results are validated against actual database content.
+    
+    Responses to queries without conversation history are cached briefly, since
+    identical prompts produce the same database lookups.
     """
+    if conversation_history:
+        return _query_concierge_uncached(user_query, conversation_history)
+    
+    cache_key = _response_cache_key(user_query)
+    cached = _get_cached_response(cache_key)
+    if cached is not None:
+        return cached
+    
+    result = _query_concierge_uncached(user_query)
+    _store_cached_response(cache_key, result)
+    return result
+
+def _query_concierge_uncached(user_query, conversation_history=None):
+    """Process a concierge query without consulting the response cache."""
     # Get Gemini API key
     # Check if AI Concierge is enabled
     from src.utils.config import Config
@@ -676,21 +847,19 @@ def query_concierge(user_query, conversation_history=None):
         # Check if user is asking for statistics or specific resource information
         query_lower = user_query.lower()
         
+        intents = detect_intents(query_lower)
+        
         # Detect statistics questions
-        stats_questions = ['how many', 'total', 'count', 'statistics', 'stats', 'number of']
-        is_stats_query = any(keyword in query_lower for keyword in stats_questions)
+        is_stats_query = 'stats' in intents
         
         # Detect largest/biggest resource questions
-        largest_keywords = ['largest', 'biggest', 'maximum capacity', 'max capacity', 'highest capacity', 'most capacity']
-        is_largest_query = any(keyword in query_lower for keyword in largest_keywords)
+        is_largest_query = 'largest' in intents
         
         # Detect specific resource lookup
-        resource_lookup_keywords = ['tell me about', 'about', 'details about', 'information about', 'what is', 'describe']
-        is_resource_lookup = any(keyword in query_lower for keyword in resource_lookup_keywords)
+        is_resource_lookup = 'lookup' in intents
         
         # Detect category-specific queries
-        category_keywords = ['study rooms', 'lab equipment', 'av equipment', 'event spaces', 'tutoring', 'all study rooms', 'all event spaces']
-        is_category_query = any(keyword in query_lower for keyword in category_keywords)
+        is_category_query = 'category' in intents
         # Extract category from query
         category_in_query = None
         if is_category_query:
@@ -714,8 +883,7 @@ def query_concierge(user_query, conversation_history=None):
                     break
         
         # Detect location-based queries
-        location_keywords = ['at', 'near', 'in', 'located at', 'resources at', 'resources in', 'resources near']
-        is_location_query = any(keyword in query_lower for keyword in location_keywords)
+        is_location_query = 'location' in intents
         # Try to extract location from query
         location_in_query = None
         if is_location_query:
@@ -729,12 +897,10 @@ def query_concierge(user_query, conversation_history=None):
                         break
         
         # Detect top-rated/best resources queries
-        top_rated_keywords = ['best', 'top rated', 'highest rated', 'most rated', 'top', 'best rated', 'highly rated']
-        is_top_rated_query = any(keyword in query_lower for keyword in top_rated_keywords)
+        is_top_rated_query = 'top_rated' in intents
         
         # Detect availability queries
-        availability_keywords = ['available', 'availability', 'is available', 'when available', 'free', 'booked', 'when can i book']
-        is_availability_query = any(keyword in query_lower for keyword in availability_keywords)
+        is_availability_query = 'availability' in intents
         # Extract date from availability query (today, tomorrow, specific date)
         availability_date = None
         if is_availability_query:
@@ -744,24 +910,19 @@ def query_concierge(user_query, conversation_history=None):
                 availability_date = 'tomorrow'
             else:
                 # Try to extract a date pattern
-                import re
                 date_pattern = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}'
                 match = re.search(date_pattern, query_lower)
                 if match:
                     availability_date = match.group()
         
         # Detect recently added queries
-        recent_keywords = ['new', 'recent', 'recently added', 'latest', 'newest', 'just added']
-        is_recent_query = any(keyword in query_lower for keyword in recent_keywords)
+        is_recent_query = 'recent' in intents
         
         # Detect comparison queries
-        comparison_keywords = ['compare', 'difference', 'vs', 'versus', 'versus', 'better', 'which is better']
-        is_comparison_query = any(keyword in query_lower for keyword in comparison_keywords)
+        is_comparison_query = 'comparison' in intents
         
         # Detect if user wants to search for resources (explicit search queries)
-        search_keywords = ['find', 'search', 'looking for', 'need', 'want', 'show me', 'book', 'reserve', 
-                          'resource', 'what resources', 'list resources', 'show resources']
-        should_search = any(keyword in query_lower for keyword in search_keywords)
+        should_search = 'search' in intents
         
         # Initialize resources array - will only be populated with relevant resources
         resources = []
@@ -771,14 +932,7 @@ def query_concierge(user_query, conversation_history=None):
         if is_stats_query:
             stats = get_database_statistics()
             if stats:
-                stats_context = "\n\nDatabase Statistics:\n"
-                stats_context += f"- Total published resources: {stats.get('total_resources', 0)}\n"
-                stats_context += f"- Total bookings: {stats.get('total_bookings', 0)}\n"
-                stats_context += f"- Featured resources: {stats.get('featured_resources', 0)}\n"
-                if stats.get('resources_by_category'):
-                    stats_context += f"- Resources by category:\n"
-                    for cat, count in stats['resources_by_category'].items():
-                        stats_context += f"  * {cat.replace('_', ' ').title()}: {count}\n"
+                stats_context = "\n\nDatabase Statistics:\n" + format_statistics_context(stats)
         
         # Get largest resource if requested (add to resources array)
         largest_resource_context = ""
@@ -788,21 +942,19 @@ def query_concierge(user_query, conversation_history=None):
                 # Add to resources array so they're returned in the response
                 resources = largest_resources
                 # Enrich with reviews
-                for resource in resources:
-                    reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                    if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                        resource['rating'] = reviews_result['data']['stats']['avg_rating']
+                attach_ratings(resources)
                 
-                largest_resource_context = "\n\nLargest Resource(s) by Capacity (from database query):\n"
+                lines = ["\n\nLargest Resource(s) by Capacity (from database query):\n"]
                 for res in largest_resources:
-                    largest_resource_context += f"- {res['title']} (ID: {res['resource_id']})\n"
-                    largest_resource_context += f"  Category: {res['category'].replace('_', ' ').title()}\n"
-                    largest_resource_context += f"  Location: {res['location']}\n"
-                    largest_resource_context += f"  Capacity: {res['capacity']}\n"
+                    lines.append(f"- {res['title']} (ID: {res['resource_id']})\n")
+                    lines.append(f"  Category: {res['category'].replace('_', ' ').title()}\n")
+                    lines.append(f"  Location: {res['location']}\n")
+                    lines.append(f"  Capacity: {res['capacity']}\n")
                     if res['description']:
                         desc = res['description'][:200] + "..." if len(res['description']) > 200 else res['description']
-                        largest_resource_context += f"  Description: {desc}\n"
-                    largest_resource_context += "\n"
+                        lines.append(f"  Description: {desc}\n")
+                    lines.append("\n")
+                largest_resource_context = "".join(lines)
         
         # Try to extract resource name from query for lookup (for queries like "tell me about Merchants Bank Field")
         resource_info_context = ""
@@ -865,39 +1017,30 @@ def query_concierge(user_query, conversation_history=None):
                             if res['resource_id'] not in existing_ids:
                                 resources.append(res)
                     
-                    # Enrich with reviews
-                    for resource in resources:
-                        if 'rating' not in resource:
-                            reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                            if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                                resource['rating'] = reviews_result['data']['stats']['avg_rating']
-                    
                     # Also search for related resources using the resource name as keyword
                     search_result = search_resources(
                         keyword=resource_name,
                         page=1,
-                        page_size=5  # Limit to 5 related resources
+                        page_size=5,  # Limit to 5 related resources
+                        exclude_ids=[r['resource_id'] for r in resources]
                     )
                     if search_result['success']:
-                        related_resources = search_result['data']['resources']
-                        existing_ids = {r['resource_id'] for r in resources}
-                        for rel_res in related_resources:
-                            if rel_res['resource_id'] not in existing_ids:
-                                reviews_result = get_resource_reviews(rel_res['resource_id'], limit=1)
-                                if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                                    rel_res['rating'] = reviews_result['data']['stats']['avg_rating']
-                                resources.append(rel_res)
+                        resources.extend(search_result['data']['resources'])
+                    
+                    # Enrich main and related resources with reviews
+                    attach_ratings(resources)
                     
-                    resource_info_context = "\n\nResource Details from Database:\n"
+                    info_lines = ["\n\nResource Details from Database:\n"]
                     for res in found_resources[:3]:  # Limit to top 3 matches for context
                         capacity_text = f", Capacity: {res['capacity']}" if res['capacity'] is not None else ""
-                        resource_info_context += f"- {res['title']} (ID: {res['resource_id']})\n"
-                        resource_info_context += f"  Category: {res['category'].replace('_', ' ').title()}\n"
-                        resource_info_context += f"  Location: {res['location']}{capacity_text}\n"
+                        info_lines.append(f"- {res['title']} (ID: {res['resource_id']})\n")
+                        info_lines.append(f"  Category: {res['category'].replace('_', ' ').title()}\n")
+                        info_lines.append(f"  Location: {res['location']}{capacity_text}\n")
                         if res['description']:
                             desc = res['description'][:200] + "..." if len(res['description']) > 200 else res['description']
-                            resource_info_context += f"  Description: {desc}\n"
-                        resource_info_context += "\n"
+                            info_lines.append(f"  Description: {desc}\n")
+                        info_lines.append("\n")
+                    resource_info_context = "".join(info_lines)
         
         # Handle category-specific queries (e.g., "show me all study rooms")
         category_context = ""
@@ -905,11 +1048,12 @@ def query_concierge(user_query, conversation_history=None):
             category_resources = get_resources_by_category(category_in_query)
             if category_resources:
                 resources = category_resources
-                category_context = f"\n\nResources in {category_in_query.title()} category (from database query):\n"
+                category_lines = [f"\n\nResources in {category_in_query.title()} category (from database query):\n"]
                 for res in category_resources[:10]:  # Limit to top 10 for context
                     capacity_text = f", Capacity: {res['capacity']}" if res['capacity'] is not None else ""
                     rating_text = f", Rating: {res.get('rating', 'N/A')}" if res.get('rating') else ""
-                    category_context += f"- {res['title']} at {res['location']}{capacity_text}{rating_text}\n"
+                    category_lines.append(f"- {res['title']} at {res['location']}{capacity_text}{rating_text}\n")
+                category_context = "".join(category_lines)
         
         # Handle location-based queries (e.g., "what resources are at Memorial Stadium")
         location_context = ""
@@ -917,11 +1061,12 @@ def query_concierge(user_query, conversation_history=None):
             location_resources = get_resources_by_location(location_in_query)
             if location_resources:
                 resources = location_resources
-                location_context = f"\n\nResources at/near {location_in_query.title()} (from database query):\n"
+                location_lines = [f"\n\nResources at/near {location_in_query.title()} (from database query):\n"]
                 for res in location_resources[:10]:  # Limit to top 10 for context
                     capacity_text = f", Capacity: {res['capacity']}" if res['capacity'] is not None else ""
                     rating_text = f", Rating: {res.get('rating', 'N/A')}" if res.get('rating') else ""
-                    location_context += f"- {res['title']} ({res['category'].replace('_', ' ').title()}){capacity_text}{rating_text}\n"
+                    location_lines.append(f"- {res['title']} ({res['category'].replace('_', ' ').title()}){capacity_text}{rating_text}\n")
+                location_context = "".join(location_lines)
         
         # Handle top-rated queries (e.g., "show me the best rated resources")
         top_rated_context = ""
@@ -935,10 +1080,11 @@ def query_concierge(user_query, conversation_history=None):
             if top_rated_resources:
                 resources = top_rated_resources
                 category_text = f" in {top_rated_category.title()}" if top_rated_category else ""
-                top_rated_context = f"\n\nTop-Rated Resources{category_text} (from database query):\n"
+                top_rated_lines = [f"\n\nTop-Rated Resources{category_text} (from database query):\n"]
                 for res in top_rated_resources:
                     capacity_text = f", Capacity: {res['capacity']}" if res['capacity'] is not None else ""
-                    top_rated_context += f"- {res['title']} at {res['location']} - Rating: {res.get('rating', 'N/A')}{capacity_text}\n"
+                    top_rated_lines.append(f"- {res['title']} at {res['location']} - Rating: {res.get('rating', 'N/A')}{capacity_text}\n")
+                top_rated_context = "".join(top_rated_lines)
         
         # Handle recently added queries (e.g., "show me new resources")
         recent_context = ""
@@ -946,11 +1092,12 @@ def query_concierge(user_query, conversation_history=None):
             recent_resources = get_recently_added_resources(limit=10)
             if recent_resources:
                 resources = recent_resources
-                recent_context = "\n\nRecently Added Resources (from database query):\n"
+                recent_lines = ["\n\nRecently Added Resources (from database query):\n"]
                 for res in recent_resources[:10]:
                     capacity_text = f", Capacity: {res['capacity']}" if res['capacity'] is not None else ""
                     rating_text = f", Rating: {res.get('rating', 'N/A')}" if res.get('rating') else ""
-                    recent_context += f"- {res['title']} at {res['location']}{capacity_text}{rating_text}\n"
+                    recent_lines.append(f"- {res['title']} at {res['location']}{capacity_text}{rating_text}\n")
+                recent_context = "".join(recent_lines)
         
         # Handle availability queries (e.g., "is Merchants Bank Field available today?")
         availability_context = ""
@@ -989,16 +1136,17 @@ def query_concierge(user_query, conversation_history=None):
                         
                         # Build availability context
                         if availability_date:
-                            availability_context = f"\n\nAvailability for {main_resource['title']} on {availability_date}:\n"
+                            availability_lines = [f"\n\nAvailability for {main_resource['title']} on {availability_date}:\n"]
                         else:
-                            availability_context = f"\n\nAvailability for {main_resource['title']}:\n"
+                            availability_lines = [f"\n\nAvailability for {main_resource['title']}:\n"]
                         
                         if availability_info['bookings']:
-                            availability_context += f"Upcoming bookings:\n"
+                            availability_lines.append("Upcoming bookings:\n")
                             for booking in availability_info['bookings'][:5]:
-                                availability_context += f"- {booking['start_datetime']} to {booking['end_datetime']} ({booking['status']})\n"
+                                availability_lines.append(f"- {booking['start_datetime']} to {booking['end_datetime']} ({booking['status']})\n")
                         else:
-                            availability_context += "No upcoming bookings found - resource is available!\n"
+                            availability_lines.append("No upcoming bookings found - resource is available!\n")
+                        availability_context = "".join(availability_lines)
         
         # Handle comparison queries (e.g., "compare Merchants Bank Field and Kelley Balance Room")
         comparison_context = ""
@@ -1091,28 +1239,24 @@ def query_concierge(user_query, conversation_history=None):
             if search_result['success']:
                 resources = search_result['data']['resources']
                 # Enrich with reviews
-                for resource in resources:
-                    reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                    if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                        resource['rating'] = reviews_result['data']['stats']['avg_rating']
+                attach_ratings(resources)
         
         # Build resources context for AI
         # Include all resources that were found (up to the search limit, which is 10)
         resources_context = ""
         if resources:
-            resources_context = "\n\nFound Resources from Search:\n"
+            resource_lines = ["\n\nFound Resources from Search:\n"]
             # Show all resources found (up to the search limit), not just 5
             for i, resource in enumerate(resources, 1):
                 rating_text = f" (Rating: {resource.get('rating', 'N/A')})" if resource.get('rating') else ""
                 capacity_text = f"Capacity: {resource['capacity']}" if resource['capacity'] is not None else "Capacity: N/A (no capacity constraint)"
-                resources_context += f"{i}. {resource['title']} - Location: {resource['location']} - {capacity_text}{rating_text} - Resource ID: {resource['resource_id']}\n"
+                resource_lines.append(f"{i}. {resource['title']} - Location: {resource['location']} - {capacity_text}{rating_text} - Resource ID: {resource['resource_id']}\n")
+            resources_context = "".join(resource_lines)
         
         # Build conversation history string
         history_text = ""
         if conversation_history:
-            history_text = "\n\nPrevious conversation:\n"
-            for msg in conversation_history:
-                history_text += f"{msg}\n"
+            history_text = "\n\nPrevious conversation:\n" + "".join(f"{msg}\n" for msg in conversation_history)
         
         # Create comprehensive prompt with strict guardrails
         prompt = f"""{system_context}
@@ -1238,33 +1382,25 @@ def query_concierge_fallback(user_query):
     try:
         query_lower = user_query.lower()
         
+        intents = detect_intents(query_lower)
+        
         # Check for general help queries
-        help_keywords = ['help', 'what can you do', 'how can you help', 'what do you do', 'assist', 'support']
-        is_help_query = any(keyword in query_lower for keyword in help_keywords)
+        is_help_query = 'help' in intents
         
         # Check for statistics questions
-        stats_questions = ['how many', 'total', 'count', 'statistics', 'stats', 'number of']
-        is_stats_query = any(keyword in query_lower for keyword in stats_questions)
+        is_stats_query = 'stats' in intents
         
         # Check for largest/biggest resource questions
-        largest_keywords = ['largest', 'biggest', 'maximum capacity', 'max capacity', 'highest capacity', 'most capacity']
-        is_largest_query = any(keyword in query_lower for keyword in largest_keywords)
+        is_largest_query = 'largest' in intents
         
         # Check for resource lookup
-        resource_lookup_keywords = ['tell me about', 'about', 'details about', 'information about', 'what is', 'describe']
-        is_resource_lookup = any(keyword in query_lower for keyword in resource_lookup_keywords)
+        is_resource_lookup = 'lookup' in intents
         
         # Handle statistics queries directly
         if is_stats_query:
             stats = get_database_statistics()
             if stats:
-                stats_text = f"""There are currently {stats.get('total_resources', 0)} published resources in the system.
-Total bookings made: {stats.get('total_bookings', 0)}
-Featured resources: {stats.get('featured_resources', 0)}"""
-                if stats.get('resources_by_category'):
-                    stats_text += "\n\nResources by category:"
-                    for cat, count in stats['resources_by_category'].items():
-                        stats_text += f"\n- {cat.replace('_', ' ').title()}: {count}"
+                stats_text = format_statistics_summary(stats)
                 
                 return {
                     'success': True,
@@ -1288,31 +1424,31 @@ Title: {res['title']}
 Category: {res['category'].replace('_', ' ').title()}
 Location: {res['location']}
 Capacity: {capacity_text}"""
-                if res['description']:
-                    desc = res['description'][:300] + "..." if len(res['description']) > 300 else res['description']
-                    response += f"\nDescription: {desc}"
-            else:
-                response = f"The largest resource(s) by capacity ({largest_resources[0]['capacity']} people):\n\n"
-                for res in largest_resources:
-                    response += f"- {res['title']} at {res['location']}\n"
-            
-            return {
-                'success': True,
-                'data': {
-                    'query': user_query,
-                    'resources': largest_resources,
-                    'response': response
+                    if res['description']:
+                        desc = res['description'][:300] + "..." if len(res['description']) > 300 else res['description']
+                        response += f"\nDescription: {desc}"
+                else:
+                    lines = [f"The largest resource(s) by capacity ({largest_resources[0]['capacity']} people):\n\n"]
+                    lines.extend(f"- {res['title']} at {res['location']}\n" for res in largest_resources)
+                    response = "".join(lines)
+                
+                return {
+                    'success': True,
+                    'data': {
+                        'query': user_query,
+                        'resources': largest_resources,
+                        'response': response
+                    }
                 }
-            }
-        else:
-            return {
-                'success': True,
-                'data': {
-                    'query': user_query,
-                    'resources': [],
-                    'response': "I couldn't find any resources with capacity information in the database."
+            else:
+                return {
+                    'success': True,
+                    'data': {
+                        'query': user_query,
+                        'resources': [],
+                        'response': "I couldn't find any resources with capacity information in the database."
+                    }
                 }
-            }
         
         # Handle resource lookup queries directly
         if is_resource_lookup:
@@ -1326,35 +1462,12 @@ Capacity: {capacity_text}"""
                         if resource_name:
                             break
             
-            if resource_name:
-                found_resources = get_resource_by_name_or_id(resource_name)
-                if found_resources:
-                    # Get the main resource
-                    main_resource = found_resources[0]
-                
-                # Also search for related resources using the resource name as keyword
-                # This finds resources that might be related (e.g., if asking about "Memorial Stadium",
-                # might also find other stadium-related resources)
-                related_resources = []
-                search_result = search_resources(
-                    keyword=resource_name,
-                    page=1,
-                    page_size=5  # Limit to 5 related resources
-                )
-                if search_result['success']:
-                    all_found = search_result['data']['resources']
-                    # Exclude the main resource from related resources
-                    main_resource_id = main_resource['resource_id']
-                    related_resources = [r for r in all_found if r['resource_id'] != main_resource_id]
-                
-                # Combine main resource with related resources
-                all_resources = [main_resource] + related_resources
-                
-                # Enrich with reviews
-                for resource in all_resources:
-                    reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                    if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                        resource['rating'] = reviews_result['data']['stats']['avg_rating']
+            # Fetch the main resource plus related resources (e.g., if asking about "Memorial Stadium",
+            # other stadium-related resources) and their ratings in one query
+            all_resources = get_resource_with_related(resource_name) if resource_name else []
+            if all_resources:
+                main_resource = all_resources[0]
+                related_resources = all_resources[1:]
                 
                 capacity_text = f"\nCapacity: {main_resource['capacity']}" if main_resource['capacity'] is not None else ""
                 rating_text = f"\nRating: {main_resource.get('rating', 'N/A')}" if main_resource.get('rating') else ""
@@ -1369,9 +1482,10 @@ Location: {main_resource['location']}{capacity_text}{rating_text}"""
                     response += f"\nDescription: {desc}"
                 
                 if related_resources:
-                    response += f"\n\nRelated resources that might interest you:"
-                    for rel_res in related_resources[:3]:  # Show up to 3 related resources
-                        response += f"\n- {rel_res['title']} at {rel_res['location']}"
+                    lines = [response, "\n\nRelated resources that might interest you:"]
+                    # Show up to 3 related resources
+                    lines.extend(f"\n- {rel_res['title']} at {rel_res['location']}" for rel_res in related_resources[:3])
+                    response = "".join(lines)
                 
                 return {
                     'success': True,
@@ -1387,14 +1501,7 @@ Location: {main_resource['location']}{capacity_text}{rating_text}"""
             stats = get_database_statistics()
             stats_context = ""
             if stats:
-                stats_text = f"""There are currently {stats.get('total_resources', 0)} published resources in the system.
-Total bookings made: {stats.get('total_bookings', 0)}
-Featured resources: {stats.get('featured_resources', 0)}"""
-                if stats.get('resources_by_category'):
-                    stats_text += "\n\nResources by category:"
-                    for cat, count in stats['resources_by_category'].items():
-                        stats_text += f"\n- {cat.replace('_', ' ').title()}: {count}"
-                stats_context = stats_text
+                stats_context = format_statistics_summary(stats)
             response = f"""Hello! I'm Crimson, your AI assistant EXCLUSIVELY for the Indiana University Campus Resource Hub. 
 
 IMPORTANT: I can ONLY help with topics related to the campus resource hub. I cannot discuss unrelated topics.
@@ -1417,14 +1524,14 @@ Try asking me things like:
 {stats_context}
 
 How can I help you today?"""
-        return {
-            'success': True,
-            'data': {
-                'query': user_query,
-                'resources': [],
-                'response': response
+            return {
+                'success': True,
+                'data': {
+                    'query': user_query,
+                    'resources': [],
+                    'response': response
+                }
             }
-        }
         
         # Parse query for search
         search_params = parse_query(user_query)
@@ -1450,14 +1557,11 @@ How can I help you today?"""
         resources = search_result['data']['resources']
         
         # Enrich with review information
-        for resource in resources:
-            try:
-                reviews_result = get_resource_reviews(resource['resource_id'], limit=1)
-                if reviews_result['success'] and reviews_result['data']['stats']['avg_rating']:
-                    resource['rating'] = reviews_result['data']['stats']['avg_rating']
-            except Exception as e:
-                logger.warning(f"Error getting reviews for resource {resource['resource_id']}: {e}")
-                # Continue without rating if review fetch fails
+        try:
+            attach_ratings(resources)
+        except Exception as e:
+            logger.warning(f"Error getting reviews for resources: {e}")
+            # Continue without ratings if review fetch fails
         
         # Generate natural language response
         if not resources:
@@ -1468,12 +1572,13 @@ How can I help you today?"""
             capacity_text = f" with capacity for {resource['capacity']} people" if resource['capacity'] is not None else ""
             response = f"I found {resource['title']} located at {resource['location']}{capacity_text}{rating_text}. It's a {resource['category'].replace('_', ' ')}."
         else:
-            response = f"I found {len(resources)} resources matching your query. Here are the results:\n\n"
+            lines = [f"I found {len(resources)} resources matching your query. Here are the results:\n\n"]
             # Show all resources found, not just limited to 5
             for i, resource in enumerate(resources, 1):
                 rating_text = f" (Rating: {resource.get('rating', 'N/A')})" if resource.get('rating') else ""
                 capacity_text = f" - Capacity: {resource['capacity']}" if resource['capacity'] is not None else ""
-                response += f"{i}. {resource['title']} - {resource['location']}{capacity_text}{rating_text}\n"
+                lines.append(f"{i}. {resource['title']} - {resource['location']}{capacity_text}{rating_text}\n")
+            response = "".join(lines)
         
         return {
             'success': True,
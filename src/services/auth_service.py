@@ -3,9 +3,24 @@ Authentication service with user registration, login, and validation.
 """
 import bcrypt
 import re
-from src.data_access.database import get_db_connection
+import sqlite3
+import string
+from src.data_access.database import get_db_connection, bump_data_version
 from src.models.user import User
 
+# Password complexity classes, checked in this order (bit, error message)
+_PASSWORD_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>')
+_PASSWORD_CLASS_ERRORS = (
+    (1, "Password must contain at least one uppercase letter"),
+    (2, "Password must contain at least one lowercase letter"),
+    (4, "Password must contain at least one number"),
+    (8, "Password must contain at least one special character"),
+)
+_PASSWORD_ALL_CLASSES = 1 | 2 | 4 | 8
+
+# Characters allowed in names: letters, whitespace, hyphens, apostrophes
+_NAME_ALLOWED = frozenset(string.ascii_letters + string.whitespace + "-'")
+
 def validate_email(email):
     """Validate email format."""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -16,17 +31,20 @@ def validate_password(password):
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not re.search(r'[A-Z]', password):
-        return False, "Password must contain at least one uppercase letter"
-    
-    if not re.search(r'[a-z]', password):
-        return False, "Password must contain at least one lowercase letter"
-    
-    if not re.search(r'[0-9]', password):
-        return False, "Password must contain at least one number"
-    
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-        return False, "Password must contain at least one special character"
+    # Classify every character in a single pass, accumulating one bit per required class
+    flags = 0
+    for ch in password:
+        o = ord(ch)
+        flags |= ((65 <= o <= 90)
+                  | ((97 <= o <= 122) << 1)
+                  | ((48 <= o <= 57) << 2)
+                  | ((ch in _PASSWORD_SPECIALS) << 3))
+        if flags == _PASSWORD_ALL_CLASSES:
+            break
+    
+    for bit, message in _PASSWORD_CLASS_ERRORS:
+        if not flags & bit:
+            return False, message
     
     return True, "Password is valid"
 
@@ -36,7 +54,8 @@ def validate_name(name):
         return False, "Name must be between 2 and 100 characters"
     
     # Allow letters, spaces, hyphens, apostrophes
-    if not re.match(r"^[a-zA-Z\s\-']+$", name):
+    # Any Unicode whitespace (e.g. no-break spaces) is accepted, as \s was
+    if not all(ch in _NAME_ALLOWED or ch.isspace() for ch in name):
         return False, "Name can only contain letters, spaces, hyphens, and apostrophes"
     
     return True, "Name is valid"
@@ -58,24 +77,32 @@ def register_user(name, email, password, role='student', department=None):
     if role not in ['student', 'staff', 'admin']:
         return {'success': False, 'error': 'Invalid role'}
     
-    # Check if email already exists (excluding deleted users)
+    # Hash password before opening a connection so the database is only held for the check and INSERT
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(12)).decode('utf-8')
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        # Check if email already exists (excluding deleted users)
         cursor.execute("SELECT user_id FROM users WHERE email = ? AND (deleted = 0 OR deleted IS NULL)", (email.lower(),))
         if cursor.fetchone():
             return {'success': False, 'error': 'Email already registered'}
         
-        # Hash password
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(12)).decode('utf-8')
-        
-        # Insert user
-        cursor.execute("""
-            INSERT INTO users (name, email, password_hash, role, department)
-            VALUES (?, ?, ?, ?, ?)
-        """, (name, email.lower(), password_hash, role, department))
+        # Insert user; the UNIQUE constraint on email rejects a concurrent signup
+        # that took the email after the check
+        try:
+            cursor.execute("""
+                INSERT INTO users (name, email, password_hash, role, department)
+                VALUES (?, ?, ?, ?, ?)
+            """, (name, email.lower(), password_hash, role, department))
+        except sqlite3.IntegrityError as e:
+            if 'users.email' not in str(e):
+                raise
+            return {'success': False, 'error': 'Email already registered'}
         
         user_id = cursor.lastrowid
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'user_id': user_id}}
 
 def authenticate_user(email, password):
@@ -1,9 +1,14 @@
 """
 Booking service with conflict detection.
 """
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from src.data_access.database import get_db_connection
-from dateutil.tz import tzutc
+from functools import lru_cache
+from src.data_access.database import get_db_connection, get_database_path, bump_data_version
+from dateutil.tz import gettz, tzutc
 from dateutil import parser
 from src.utils.logging_config import get_logger
 from src.utils.exceptions import BookingError, ValidationError, ConflictError, NotFoundError
@@ -11,6 +16,120 @@ from src.utils.config import Config
 
 logger = get_logger(__name__)
 
+_UTC = tzutc()
+
+@lru_cache(maxsize=8)
+def _get_tz(name):
+    """Resolve a timezone name once; keyed by name so Config.TIMEZONE may change at runtime."""
+    return gettz(name)
+
+@lru_cache(maxsize=1024)
+def _hour_utc_offset(tz_name, utc_hour):
+    """
+    UTC offset of a timezone during the naive UTC hour starting at utc_hour,
+    or None if the offset changes within that hour (a DST transition).
+    """
+    tz = _get_tz(tz_name)
+    offset = utc_hour.replace(tzinfo=_UTC).astimezone(tz).utcoffset()
+    if (utc_hour + timedelta(hours=1)).replace(tzinfo=_UTC).astimezone(tz).utcoffset() != offset:
+        return None
+    return offset
+
+def _local_wall_time(dt, tz_name):
+    """Naive local wall time of an aware datetime, using cached hourly UTC offsets."""
+    utc_naive = dt.replace(tzinfo=None) - dt.utcoffset()
+    offset = _hour_utc_offset(tz_name, utc_naive.replace(minute=0, second=0, microsecond=0))
+    if offset is None:
+        return dt.astimezone(_get_tz(tz_name)).replace(tzinfo=None)
+    return utc_naive + offset
+
+def _to_datetime(value):
+    """Parse an ISO 8601 string (a trailing 'Z' means UTC); datetimes pass through unchanged."""
+    if not isinstance(value, str):
+        return value
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _to_utc_iso(value):
+    """
+    ISO 8601 string in UTC (naive values are taken as UTC).
+    Booking times are stored and compared in this form, so comparing them as text
+    in SQL orders them chronologically.
+    """
+    dt = _to_datetime(value)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=_UTC).isoformat()
+    return dt.astimezone(_UTC).isoformat()
+
+# Overlap check: (existing_start < new_end AND existing_end > new_start).
+# Only approved bookings are checked since bookings are auto-approved on creation.
+_CONFLICT_WHERE = """
+        WHERE resource_id = ?
+        AND status = 'approved'
+        AND start_datetime < ? AND end_datetime > ?"""
+_CONFLICT_WHERE_EXCLUDING = _CONFLICT_WHERE + " AND booking_id != ?"
+
+# (exists_only, excluding_booking) -> SQL; every variant is fixed text so
+# sqlite3's statement cache always hits
+_CONFLICT_QUERIES = {
+    (exists_only, excluding): (
+        f"SELECT EXISTS (SELECT 1 FROM bookings{where})" if exists_only
+        else f"SELECT booking_id, resource_id, start_datetime, end_datetime, status FROM bookings{where}"
+    )
+    for exists_only in (False, True)
+    for excluding, where in ((False, _CONFLICT_WHERE), (True, _CONFLICT_WHERE_EXCLUDING))
+}
+
+_SQL_RESOURCE_HOURS = """
+    SELECT operating_hours_start, operating_hours_end, is_24_hours
+    FROM resources 
+    WHERE resource_id = ?
+"""
+
+_SQL_INSERT_BOOKING = """
+    INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status, rejection_reason)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Inserts only when no approved booking overlaps; parameters are the insert
+# values followed by the _CONFLICT_WHERE values
+_SQL_INSERT_BOOKING_IF_FREE = f"""
+    INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status, rejection_reason)
+    SELECT ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM bookings{_CONFLICT_WHERE})
+"""
+
+_SQL_COMPLETE_ENDED_BOOKINGS = """
+    UPDATE bookings
+    SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+    WHERE status = 'approved'
+    AND end_datetime < ?
+"""
+
+_SQL_GET_BOOKING = "SELECT * FROM bookings WHERE booking_id = ?"
+
+def _conflict_query(exists_only, resource_id, start_iso, end_iso, exclude_booking_id=None):
+    """Pick the precomputed conflict query and build its parameters from _to_utc_iso() strings."""
+    params = [resource_id, end_iso, start_iso]
+    if exclude_booking_id:
+        params.append(exclude_booking_id)
+    
+    return _CONFLICT_QUERIES[(exists_only, bool(exclude_booking_id))], params
+
+def _run_conflict_query(query, params, cursor, fetch):
+    """Execute a conflict query on the given cursor, or on a new connection if none is given."""
+    if cursor:
+        # Use provided cursor (for transaction safety)
+        cursor.execute(query, params)
+        return fetch(cursor)
+    
+    # Create new connection
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return fetch(cursor)
+
 def check_conflicts(resource_id, start_datetime, end_datetime, exclude_booking_id=None, cursor=None):
     """
     Check for conflicting bookings.
@@ -25,87 +144,112 @@ def check_conflicts(resource_id, start_datetime, end_datetime, exclude_booking_i
         cursor: Optional database cursor to use (for transaction safety)
     
     Returns:
-        List of conflicting bookings
+        List of conflicting bookings (booking_id, resource_id, start_datetime, end_datetime, status)
     """
-    # Convert to datetime objects if strings
-    if isinstance(start_datetime, str):
-        start_dt = datetime.fromisoformat(start_datetime.replace('Z', '+00:00'))
-    else:
-        start_dt = start_datetime
-        
-    if isinstance(end_datetime, str):
-        end_dt = datetime.fromisoformat(end_datetime.replace('Z', '+00:00'))
-    else:
-        end_dt = end_datetime
-    
-    # Standard overlap check: (existing_start < new_end AND existing_end > new_start)
-    # Only check approved bookings since bookings are auto-approved on creation
-    query = """
-        SELECT * FROM bookings
-        WHERE resource_id = ?
-        AND status = 'approved'
-        AND start_datetime < ? AND end_datetime > ?
+    return _select_conflicts(resource_id, _to_utc_iso(start_datetime), _to_utc_iso(end_datetime),
+                             exclude_booking_id, cursor)
+
+def _select_conflicts(resource_id, start_iso, end_iso, exclude_booking_id=None, cursor=None):
+    """check_conflicts() for times already converted with _to_utc_iso()."""
+    query, params = _conflict_query(False, resource_id, start_iso, end_iso, exclude_booking_id)
+    # Stream rows straight into dicts; callers serialize the result to JSON, which Row objects don't support
+    return _run_conflict_query(query, params, cursor, lambda cur: list(map(dict, cur)))
+
+def has_conflict(resource_id, start_datetime, end_datetime, exclude_booking_id=None, cursor=None):
     """
-    params = [resource_id, end_dt.isoformat(), start_dt.isoformat()]
+    Check whether any approved booking overlaps the given time range.
+    Same arguments as check_conflicts(), but stops at the first match and returns a bool.
+    """
+    query, params = _conflict_query(True, resource_id, _to_utc_iso(start_datetime), _to_utc_iso(end_datetime),
+                                    exclude_booking_id)
+    return _run_conflict_query(query, params, cursor, lambda cur: bool(cur.fetchone()[0]))
+
+# Change counters for each resource's approved bookings, keyed by (database path,
+# resource_id). A resource_id of None is the database-wide counter, bumped when
+# bookings of many resources may have changed at once.
+_booking_versions = {}
+_booking_versions_lock = threading.Lock()
+
+def bump_booking_version(resource_id=None):
+    """Record that a resource's (or, with None, every resource's) approved bookings changed."""
+    key = (get_database_path(), resource_id)
+    with _booking_versions_lock:
+        _booking_versions[key] = _booking_versions.get(key, 0) + 1
+    bump_data_version()
+
+def get_booking_version(resource_id):
+    """Token that changes whenever a resource's approved bookings may have changed (for caches)."""
+    db_path = get_database_path()
+    with _booking_versions_lock:
+        return (_booking_versions.get((db_path, resource_id), 0), _booking_versions.get((db_path, None), 0))
+
+# Operating hours change rarely, so validations and calendar renders reuse them for
+# a few minutes. Keyed by (database path, resource_id); update_resource() invalidates entries.
+# Plain dict reads and writes are atomic, and a racing refill stores the same value.
+_OPERATING_HOURS_TTL_SECONDS = 300
+_operating_hours_cache = {}
+
+def get_operating_hours(resource_id):
+    """Return (operating_start, operating_end, is_24_hours) for a resource, or None if it doesn't exist."""
+    key = (get_database_path(), resource_id)
+    now = time.monotonic()
+    cached = _operating_hours_cache.get(key)
+    if cached is not None and now - cached[0] < _OPERATING_HOURS_TTL_SECONDS:
+        return cached[1]
     
-    if exclude_booking_id:
-        query += " AND booking_id != ?"
-        params.append(exclude_booking_id)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_RESOURCE_HOURS, (resource_id,))
+        result = cursor.fetchone()
     
-    if cursor:
-        # Use provided cursor (for transaction safety)
-        cursor.execute(query, params)
-        conflicts = [dict(row) for row in cursor.fetchall()]
-    else:
-        # Create new connection
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conflicts = [dict(row) for row in cursor.fetchall()]
+    if not result:
+        return None
     
-    return conflicts
+    is_24_hours = bool(result['is_24_hours']) if result['is_24_hours'] is not None else False
+    operating_hours = (result['operating_hours_start'], result['operating_hours_end'], is_24_hours)
+    _operating_hours_cache[key] = (now, operating_hours)
+    return operating_hours
+
+def invalidate_operating_hours(resource_id):
+    """Drop cached operating hours for a resource after it has been updated."""
+    _operating_hours_cache.pop((get_database_path(), resource_id), None)
+
+@lru_cache(maxsize=8)
+def _booking_limits(min_advance_hours, min_duration_minutes, max_duration_hours):
+    """Build the (min_advance, min_duration, max_duration) timedeltas once per set of Config values."""
+    return (
+        timedelta(hours=min_advance_hours),
+        timedelta(minutes=min_duration_minutes),
+        timedelta(hours=max_duration_hours),
+    )
 
 def validate_booking_datetime(start_datetime, end_datetime, resource_id=None):
     """Validate booking datetime constraints using resource-specific operating hours."""
     try:
-        if isinstance(start_datetime, str):
-            start_dt = datetime.fromisoformat(start_datetime.replace('Z', '+00:00'))
-        else:
-            start_dt = start_datetime
-        
-        if isinstance(end_datetime, str):
-            end_dt = datetime.fromisoformat(end_datetime.replace('Z', '+00:00'))
-        else:
-            end_dt = end_datetime
+        start_dt = _to_datetime(start_datetime)
+        end_dt = _to_datetime(end_datetime)
     except (ValueError, TypeError) as e:
         logger.warning(f"Invalid datetime format: {e}")
         return False, None, None, "Invalid datetime format"
     
     # Ensure datetimes are timezone-aware (UTC)
     if start_dt.tzinfo is None:
-        start_dt = start_dt.replace(tzinfo=tzutc())
+        start_dt = start_dt.replace(tzinfo=_UTC)
     if end_dt.tzinfo is None:
-        end_dt = end_dt.replace(tzinfo=tzutc())
+        end_dt = end_dt.replace(tzinfo=_UTC)
+    
+    # Read each booking setting once
+    min_advance_hours = Config.BOOKING_MIN_ADVANCE_HOURS
+    min_duration_minutes = Config.BOOKING_MIN_DURATION_MINUTES
+    max_duration_hours = Config.BOOKING_MAX_DURATION_HOURS
+    min_advance, min_duration, max_duration = _booking_limits(min_advance_hours, min_duration_minutes, max_duration_hours)
     
     # Get current time in UTC for comparison
-    now = datetime.now(tzutc())
+    now = datetime.now(_UTC)
     
     # Must be at least configured advance hours in the future
-    min_advance = timedelta(hours=Config.BOOKING_MIN_ADVANCE_HOURS)
     if start_dt < now + min_advance:
-        return False, None, None, f"Booking must be at least {Config.BOOKING_MIN_ADVANCE_HOURS} hour(s) in the future"
-    
-    # For operating hours validation, convert to configured timezone
-    from dateutil.tz import gettz
-    tz = gettz(Config.TIMEZONE)
-    start_dt_local = start_dt.astimezone(tz)
-    end_dt_local = end_dt.astimezone(tz)
-    
-    # Operating hours validation
-    start_hour = start_dt_local.hour
-    end_hour = end_dt_local.hour
-    start_minute = start_dt_local.minute
-    end_minute = end_dt_local.minute
+        return False, None, None, f"Booking must be at least {min_advance_hours} hour(s) in the future"
     
     # End must be after start
     if end_dt <= start_dt:
@@ -113,30 +257,17 @@ def validate_booking_datetime(start_datetime, end_datetime, resource_id=None):
     
     # Duration validation
     duration = end_dt - start_dt
-    min_duration = timedelta(minutes=Config.BOOKING_MIN_DURATION_MINUTES)
-    max_duration = timedelta(hours=Config.BOOKING_MAX_DURATION_HOURS)
-    
     if duration < min_duration:
-        return False, None, None, f"Minimum booking duration is {Config.BOOKING_MIN_DURATION_MINUTES} minutes"
+        return False, None, None, f"Minimum booking duration is {min_duration_minutes} minutes"
     if duration > max_duration:
-        return False, None, None, f"Maximum booking duration is {Config.BOOKING_MAX_DURATION_HOURS} hours"
+        return False, None, None, f"Maximum booking duration is {max_duration_hours} hours"
     
     # Operating hours validation - fetch resource-specific hours
     if resource_id:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT operating_hours_start, operating_hours_end, is_24_hours
-                FROM resources 
-                WHERE resource_id = ?
-            """, (resource_id,))
-            result = cursor.fetchone()
-            if result:
-                operating_start = result['operating_hours_start']
-                operating_end = result['operating_hours_end']
-                is_24_hours = bool(result['is_24_hours']) if result['is_24_hours'] is not None else False
-            else:
-                return False, None, None, "Resource not found"
+        operating_hours = get_operating_hours(resource_id)
+        if operating_hours is None:
+            return False, None, None, "Resource not found"
+        operating_start, operating_end, is_24_hours = operating_hours
     else:
         # Fallback to global config if resource_id not provided (for backward compatibility)
         operating_start = Config.BOOKING_OPERATING_HOURS_START
@@ -145,16 +276,76 @@ def validate_booking_datetime(start_datetime, end_datetime, resource_id=None):
     
     # Validate booking times are within operating hours (skip if 24-hour operation)
     if not is_24_hours:
+        # Compare as minutes of the day in the configured timezone
+        tz_name = Config.TIMEZONE
+        start_dt_local = _local_wall_time(start_dt, tz_name)
+        end_dt_local = _local_wall_time(end_dt, tz_name)
+        start_mod = start_dt_local.hour * 60 + start_dt_local.minute
+        end_mod = end_dt_local.hour * 60 + end_dt_local.minute
+        
         # Start time must be at or after operating_start
-        if start_hour < operating_start or (start_hour == operating_start and start_minute > 0):
+        if start_mod < operating_start * 60:
             return False, None, None, f"Booking must start at or after {operating_start:02d}:00"
         
         # End time must be at or before operating_end
-        if end_hour > operating_end or (end_hour == operating_end and end_minute > 0):
+        if end_mod > operating_end * 60:
             return False, None, None, f"Booking must end at or before {operating_end:02d}:00"
     
     return True, start_dt, end_dt, "Valid"
 
+# Notifications are sent on worker threads so booking requests return as soon as
+# the booking is committed. The requester email and resource title are read on the
+# request's own connection first, so a notification always describes the database
+# the booking was written to. concurrent.futures joins these workers at interpreter
+# exit, so queued notifications still go out.
+_NOTIFY_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='booking-notify')
+_pending_notifications = set()
+_pending_notifications_lock = threading.Lock()
+
+_SQL_NOTIFICATION_DETAILS = """
+    SELECT u.email, r.title
+    FROM users u, resources r
+    WHERE u.user_id = ? AND r.resource_id = ?
+"""
+
+def _safe_notify(description, notify, *args, **kwargs):
+    """Run a notification job, logging instead of raising on failure."""
+    try:
+        notify(*args, **kwargs)
+    except Exception as e:
+        logger.warning(f"Failed to send {description}: {e}")
+
+def _submit_notification(description, notify, **kwargs):
+    """Queue a notification send on the worker pool."""
+    future = _NOTIFY_POOL.submit(_safe_notify, description, notify, **kwargs)
+    with _pending_notifications_lock:
+        _pending_notifications.add(future)
+    future.add_done_callback(_discard_notification)
+
+def _discard_notification(future):
+    """Forget a finished notification job."""
+    with _pending_notifications_lock:
+        _pending_notifications.discard(future)
+
+def _flush_notifications(timeout=None):
+    """Wait for queued notifications to finish (e.g., before a test deletes its database)."""
+    with _pending_notifications_lock:
+        pending = list(_pending_notifications)
+    wait(pending, timeout=timeout)
+
+def _lookup_requester_and_resource(cursor, requester_id, resource_id):
+    """Return (requester_email, resource_title) for a notification, or None if either is missing."""
+    # A failed lookup skips the notification; it never fails the booking itself
+    try:
+        cursor.execute(_SQL_NOTIFICATION_DETAILS, (requester_id, resource_id))
+        row = cursor.fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to look up notification details: {e}")
+        return None
+    if not row:
+        return None
+    return row['email'] or 'unknown@example.com', row['title'] or 'Unknown Resource'
+
 def create_booking(resource_id, requester_id, start_datetime, end_datetime, status='approved', request_reason=None):
     """
     Create a new booking request with transaction-level conflict checking.
@@ -173,65 +364,61 @@ def create_booking(resource_id, requester_id, start_datetime, end_datetime, stat
     if not valid:
         return {'success': False, 'error': msg}
     
-    # Use transaction with conflict check inside transaction to prevent race conditions
-    # SQLite serializes writes, but we check conflicts within the transaction for safety
+    # A taken slot is usually caught by a plain SELECT, which runs outside any write
+    # transaction. The INSERT repeats the check itself, so no other booking can be
+    # created between checking the slot and claiming it.
+    start_iso = _to_utc_iso(start_dt)
+    end_iso = _to_utc_iso(end_dt)
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
         # Only check conflicts for approved bookings (pending bookings don't block other bookings)
         if status == 'approved':
-            # Lock the row/s to prevent concurrent bookings (SQLite handles this, but explicit is better)
-            # Re-check for conflicts within the transaction to prevent race conditions
-            # This ensures that between check and insert, no other booking was created
-            conflicts = check_conflicts(resource_id, start_dt, end_dt, cursor=cursor)
-            if conflicts:
+            conflicts = _select_conflicts(resource_id, start_iso, end_iso, cursor=cursor)
+            claimed = False
+            if not conflicts:
+                cursor.execute(_SQL_INSERT_BOOKING_IF_FREE, (resource_id, requester_id, start_iso, end_iso, status, request_reason,
+                                                             resource_id, end_iso, start_iso))
+                claimed = cursor.rowcount == 1
+                if not claimed:
+                    # Another booking claimed the slot after the pre-check; end the
+                    # write transaction before reading what it was
+                    conn.rollback()
+                    conflicts = _select_conflicts(resource_id, start_iso, end_iso, cursor=cursor)
+            
+            if not claimed:
                 logger.warning(f"Booking conflict detected for resource {resource_id}: {len(conflicts)} conflicts")
-                conn.rollback()
-                conflict_details = []
-                for conflict in conflicts:
-                    conflict_details.append({
-                        'booking_id': conflict.get('booking_id'),
-                        'start': conflict.get('start_datetime'),
-                        'end': conflict.get('end_datetime'),
-                        'status': conflict.get('status')
-                    })
                 return {
                     'success': False,
                     'error': 'Time slot conflicts with existing booking',
                     'conflicts': conflicts
                 }
-        
-        # Insert booking with specified status
-        cursor.execute("""
-            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status, rejection_reason)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (resource_id, requester_id, start_dt.isoformat(), end_dt.isoformat(), status, request_reason))
+        else:
+            # Insert booking with specified status
+            cursor.execute(_SQL_INSERT_BOOKING, (resource_id, requester_id, start_iso, end_iso, status, request_reason))
         
         booking_id = cursor.lastrowid
         conn.commit()
         logger.info(f"Created booking {booking_id} for resource {resource_id} by user {requester_id} with status {status}")
+        
+        details = _lookup_requester_and_resource(cursor, requester_id, resource_id)
+    
+    # bump_booking_version() also bumps the data version
+    if status == 'approved':
+        bump_booking_version(resource_id)
+    else:
+        bump_data_version()
     
     # Send notification for booking creation
-    try:
+    if details:
         from src.services.notification_service import send_booking_confirmation
-        from src.models.user import User
-        from src.services.resource_service import get_resource
-        
-        user = User.get(requester_id)
-        resource_result = get_resource(resource_id)
-        
-        if user and resource_result['success']:
-            resource = resource_result['data']
-            requester_email = user.email if user.email else 'unknown@example.com'
-            send_booking_confirmation(
-                booking_id=booking_id,
-                requester_email=requester_email,
-                resource_title=resource.get('title', 'Unknown Resource'),
-                start_datetime=start_dt,
-                end_datetime=end_dt
-            )
-    except Exception as e:
-        logger.warning(f"Failed to send booking confirmation notification: {e}")
+        requester_email, resource_title = details
+        _submit_notification("booking confirmation notification", send_booking_confirmation,
+                             booking_id=booking_id,
+                             requester_email=requester_email,
+                             resource_title=resource_title,
+                             start_datetime=start_dt,
+                             end_datetime=end_dt)
     
     return {'success': True, 'data': {'booking_id': booking_id}}
 
@@ -240,49 +427,52 @@ def mark_completed_bookings():
     Automatically mark approved bookings as completed when their end_datetime has passed.
     This function should be called periodically or when bookings are accessed.
     """
-    now = datetime.now(tzutc())
+    now = datetime.now(_UTC)
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        # Find all approved bookings where end_datetime < current_time
-        cursor.execute("""
-            SELECT booking_id, end_datetime
-            FROM bookings
-            WHERE status = 'approved'
-            AND end_datetime < ?
-        """, (now.isoformat(),))
-        
-        bookings_to_complete = cursor.fetchall()
-        
-        if bookings_to_complete:
-            # Update all found bookings to completed status
-            booking_ids = [row['booking_id'] for row in bookings_to_complete]
-            placeholders = ','.join(['?'] * len(booking_ids))
-            
-            cursor.execute(f"""
-                UPDATE bookings
-                SET status = 'completed', updated_at = CURRENT_TIMESTAMP
-                WHERE booking_id IN ({placeholders})
-            """, booking_ids)
-            
-            conn.commit()
-            
-            return {'success': True, 'data': {'count': len(booking_ids)}}
+        # Complete all approved bookings where end_datetime < current_time in one statement
+        cursor.execute(_SQL_COMPLETE_ENDED_BOOKINGS, (now.isoformat(),))
+        count = cursor.rowcount
+    
+    if count:
+        bump_booking_version()
     
-    return {'success': True, 'data': {'count': 0}}
+    return {'success': True, 'data': {'count': count}}
+
+# Read paths sweep for ended bookings at most this often per database, so page
+# views don't each open a write transaction that almost never changes anything.
+_COMPLETION_SWEEP_INTERVAL_SECONDS = 60
+_last_completion_sweep = {}
+_completion_sweep_lock = threading.Lock()
+
+def _sweep_completed_bookings():
+    """Run mark_completed_bookings() unless it already ran recently for this database."""
+    db_path = get_database_path()
+    now = time.monotonic()
+    with _completion_sweep_lock:
+        last_sweep = _last_completion_sweep.get(db_path)
+        if last_sweep is not None and now - last_sweep < _COMPLETION_SWEEP_INTERVAL_SECONDS:
+            return
+        _last_completion_sweep[db_path] = now
+    mark_completed_bookings()
+
+def _fetch_booking(cursor, booking_id):
+    """Read a booking row as a dict (or None) on the given cursor, without the completion sweep."""
+    cursor.execute(_SQL_GET_BOOKING, (booking_id,))
+    row = cursor.fetchone()
+    return dict(row) if row else None
 
 def get_booking(booking_id):
     """Get a booking by ID. Automatically marks as completed if past end time."""
     # Mark completed bookings before getting specific booking
-    mark_completed_bookings()
+    _sweep_completed_bookings()
     
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM bookings WHERE booking_id = ?", (booking_id,))
-        row = cursor.fetchone()
+        booking = _fetch_booking(conn.cursor(), booking_id)
         
-        if row:
-            return {'success': True, 'data': dict(row)}
+        if booking:
+            return {'success': True, 'data': booking}
         logger.warning(f"Booking {booking_id} not found")
         return {'success': False, 'error': 'Booking not found'}
 
@@ -292,16 +482,14 @@ def update_booking_status(booking_id, status, rejection_reason=None):
         logger.warning(f"Invalid booking status attempted: {status}")
         return {'success': False, 'error': 'Invalid status'}
     
-    # Get existing booking to get old status and requester info
-    booking_result = get_booking(booking_id)
-    if not booking_result['success']:
-        return {'success': False, 'error': 'Booking not found'}
-    
-    existing_booking = booking_result['data']
-    old_status = existing_booking.get('status')
-    
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        # Read the old status and requester info on the same connection as the update
+        existing_booking = _fetch_booking(cursor, booking_id)
+        if not existing_booking:
+            return {'success': False, 'error': 'Booking not found'}
+        old_status = existing_booking.get('status')
+        
         # Set rejection_reason if provided and status is denied
         if status == 'denied' and rejection_reason:
             cursor.execute("""
@@ -321,42 +509,33 @@ def update_booking_status(booking_id, status, rejection_reason=None):
             return {'success': False, 'error': 'Booking not found'}
         
         logger.info(f"Updated booking {booking_id} status from {old_status} to {status}")
+        
+        details = _lookup_requester_and_resource(cursor, existing_booking['requester_id'], existing_booking['resource_id'])
+    
+    bump_booking_version(existing_booking['resource_id'])
     
     # Send notification for status change
-    try:
+    if details:
         from src.services.notification_service import send_booking_status_change
-        from src.models.user import User
-        from src.services.resource_service import get_resource
-        
-        requester_id = existing_booking.get('requester_id')
-        resource_id = existing_booking.get('resource_id')
-        user = User.get(requester_id) if requester_id else None
-        resource_result = get_resource(resource_id) if resource_id else {'success': False}
-        
-        if user and resource_result['success']:
-            resource = resource_result['data']
-            requester_email = user.email if user.email else 'unknown@example.com'
-            send_booking_status_change(
-                booking_id=booking_id,
-                requester_email=requester_email,
-                resource_title=resource.get('title', 'Unknown Resource'),
-                old_status=old_status,
-                new_status=status,
-                reason=rejection_reason
-            )
-    except Exception as e:
-        logger.warning(f"Failed to send booking status change notification: {e}")
+        requester_email, resource_title = details
+        _submit_notification("booking status change notification", send_booking_status_change,
+                             booking_id=booking_id,
+                             requester_email=requester_email,
+                             resource_title=resource_title,
+                             old_status=old_status,
+                             new_status=status,
+                             reason=rejection_reason)
     
     return {'success': True, 'data': {'booking_id': booking_id}}
 
 def update_booking(booking_id, start_datetime=None, end_datetime=None, status=None, rejection_reason=None, skip_validation=False):
     """Update booking fields. Admin can overwrite bookings."""
-    # Get existing booking
-    booking_result = get_booking(booking_id)
-    if not booking_result['success']:
+    # Get existing booking (no completion sweep; only this row is needed)
+    with get_db_connection() as conn:
+        existing_booking = _fetch_booking(conn.cursor(), booking_id)
+    if not existing_booking:
         return {'success': False, 'error': 'Booking not found'}
     
-    existing_booking = booking_result['data']
     resource_id = existing_booking['resource_id']
     
     # Use existing values if not provided
@@ -369,8 +548,8 @@ def update_booking(booking_id, start_datetime=None, end_datetime=None, status=No
         valid, start_dt, end_dt, msg = validate_booking_datetime(new_start, new_end, resource_id=resource_id)
         if not valid:
             return {'success': False, 'error': msg}
-        new_start = start_dt.isoformat()
-        new_end = end_dt.isoformat()
+        new_start = _to_utc_iso(start_dt)
+        new_end = _to_utc_iso(end_dt)
     
     # Validate status
     if new_status not in ['approved', 'cancelled', 'completed', 'pending', 'denied']:
@@ -389,43 +568,90 @@ def update_booking(booking_id, start_datetime=None, end_datetime=None, status=No
         if cursor.rowcount == 0:
             return {'success': False, 'error': 'Booking not found'}
     
+    bump_booking_version(resource_id)
+    
     return {'success': True, 'data': {'booking_id': booking_id}}
 
+# Columns used by the booking lists, calendars and categorization helpers
+_LIST_COLUMNS = "booking_id, resource_id, requester_id, start_datetime, end_datetime, status"
+
+def _build_list_queries():
+    """
+    Precompute the list/count SQL for every combination of list_bookings filters.
+    Keeping the statement text stable per combination lets SQLite reuse its prepared statements.
+    """
+    filter_columns = ('requester_id', 'resource_id', 'status')
+    queries = {}
+    for mask in range(1 << len(filter_columns)):
+        key = tuple(bool(mask & (1 << i)) for i in range(len(filter_columns)))
+        conditions = [f"{column} = ?" for column, present in zip(filter_columns, key) if present]
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        queries[key] = (
+            f"""
+            SELECT {_LIST_COLUMNS}, COUNT(*) OVER () AS total FROM bookings
+            WHERE {where_clause}
+            ORDER BY start_datetime DESC
+            LIMIT ? OFFSET ?
+        """,
+            f"SELECT COUNT(*) FROM bookings WHERE {where_clause}"
+        )
+    return queries
+
+# (has_user_id, has_resource_id, has_status) -> (select_sql, count_sql)
+_LIST_QUERIES = _build_list_queries()
+
 def list_bookings(user_id=None, resource_id=None, status=None, limit=20, offset=0):
     """List bookings with filters. Automatically marks completed bookings."""
     # Mark completed bookings before listing
-    mark_completed_bookings()
-    
-    conditions = []
-    values = []
+    _sweep_completed_bookings()
     
-    if user_id:
-        conditions.append("requester_id = ?")
-        values.append(user_id)
-    
-    if resource_id:
-        conditions.append("resource_id = ?")
-        values.append(resource_id)
-    
-    if status:
-        conditions.append("status = ?")
-        values.append(status)
-    
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    # Values are appended in the same fixed order as the template placeholders
+    values = [value for value in (user_id, resource_id, status) if value]
+    select_sql, count_sql = _LIST_QUERIES[(bool(user_id), bool(resource_id), bool(status))]
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(f"""
-            SELECT * FROM bookings
-            WHERE {where_clause}
-            ORDER BY start_datetime DESC
-            LIMIT ? OFFSET ?
-        """, values + [limit, offset])
+        cursor.execute(select_sql, values + [limit, offset])
         
+        # The window count gives the total over all filtered rows in the same scan
         bookings = [dict(row) for row in cursor.fetchall()]
-        
-        cursor.execute(f"SELECT COUNT(*) FROM bookings WHERE {where_clause}", values)
-        total = cursor.fetchone()[0]
+        if bookings:
+            total = bookings[0]['total']
+            for booking in bookings:
+                del booking['total']
+        elif offset:
+            # Past the last page there is no row to carry the total
+            cursor.execute(count_sql, values)
+            total = cursor.fetchone()[0]
+        else:
+            total = 0
     
     return {'success': True, 'data': {'bookings': bookings, 'total': total}}
 
+_SQL_LIST_BOOKINGS_IN_RANGE = f"""
+    SELECT {_LIST_COLUMNS} FROM bookings
+    WHERE resource_id = ? AND status = ?
+    AND start_datetime < ? AND end_datetime > ?
+    ORDER BY start_datetime
+"""
+
+def list_bookings_in_range(resource_id, range_start, range_end, status='approved'):
+    """
+    List a resource's bookings that overlap a time range, oldest first.
+    Automatically marks completed bookings.
+    
+    Args:
+        resource_id: ID of the resource
+        range_start: Range start (datetime object or ISO string; naive values are UTC)
+        range_end: Range end (datetime object or ISO string; naive values are UTC)
+        status: Booking status to include
+    """
+    _sweep_completed_bookings()
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_LIST_BOOKINGS_IN_RANGE,
+                       (resource_id, status, _to_utc_iso(range_end), _to_utc_iso(range_start)))
+        bookings = list(map(dict, cursor))
+    
+    return {'success': True, 'data': {'bookings': bookings}}
@@ -1,16 +1,135 @@
 """
 Calendar processing utilities for resource booking views.
 """
-from datetime import datetime, timedelta, date, time as dt_time
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone, date, time as dt_time
+from operator import itemgetter
 from calendar import monthrange, monthcalendar
-from dateutil.tz import gettz, tzutc
+from zoneinfo import ZoneInfo
 from src.utils.datetime_utils import parse_datetime_aware, convert_to_est
 from src.utils.logging_config import get_logger
 from src.utils.config import Config
-from src.data_access.database import get_db_connection
+from src.services.booking_service import get_operating_hours, get_booking_version, list_bookings_in_range
+from src.data_access.database import get_database_path
 
 logger = get_logger(__name__)
 
+_EST_TZ = ZoneInfo('America/New_York')
+_UTC = timezone.utc
+
+
+def _build_day_slot_template():
+    """
+    Build the fixed part of the 48 half-hour day-view slots, 00:00 to 23:30.
+    The last slot ends at 23:59 rather than rolling over to 00:00 (next day).
+    """
+    slots = []
+    for hour in range(0, 24):
+        for minute in (0, 30):
+            slot_end_minutes = min(hour * 60 + minute + 30, 1439)
+            slots.append({
+                'hour': hour,
+                'minute': minute,
+                'time_minutes': hour * 60 + minute,
+                'start_time': f"{hour:02d}:{minute:02d}",
+                'end_time': f"{slot_end_minutes // 60:02d}:{slot_end_minutes % 60:02d}"
+            })
+    return tuple(slots)
+
+# Copied per render with the availability flags added
+_DAY_SLOT_TEMPLATE = _build_day_slot_template()
+
+# Assembled calendars keyed by (database path, resource, displayed month/day, today,
+# advance-booking cutoff slot, operating hours, booking version). Entries are shared
+# between requests and must be treated as read-only.
+_CALENDAR_CACHE_TTL_SECONDS = 60
+_CALENDAR_CACHE_MAX_ENTRIES = 1024
+_calendar_cache = {}
+_calendar_cache_lock = threading.Lock()
+
+
+def _get_cached_calendar(key):
+    """Return a cached calendar result, or None if missing or expired."""
+    with _calendar_cache_lock:
+        entry = _calendar_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del _calendar_cache[key]
+            return None
+    return result
+
+
+def _store_cached_calendar(key, result):
+    """Store a calendar result in the cache."""
+    with _calendar_cache_lock:
+        if len(_calendar_cache) >= _CALENDAR_CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest if still full
+            now = time.monotonic()
+            for stale_key in [k for k, (expires_at, _) in _calendar_cache.items() if expires_at < now]:
+                del _calendar_cache[stale_key]
+            if len(_calendar_cache) >= _CALENDAR_CACHE_MAX_ENTRIES:
+                del _calendar_cache[next(iter(_calendar_cache))]
+        _calendar_cache[key] = (time.monotonic() + _CALENDAR_CACHE_TTL_SECONDS, result)
+
+
+@lru_cache(maxsize=256)
+def _days_in_month(year, month):
+    """Number of days in a month."""
+    return monthrange(year, month)[1]
+
+
+@lru_cache(maxsize=256)
+def _month_calendar(year, month):
+    """Week rows of a month's day numbers (0 outside the month), as immutable tuples."""
+    return tuple(tuple(week) for week in monthcalendar(year, month))
+
+
+def _adjacent_months(year, month):
+    """Return (prev_year, prev_month, next_year, next_month), wrapping across years."""
+    return year - (month == 1), month - 1 or 12, year + (month == 12), month % 12 + 1
+
+
+def _merge_booked_intervals(booked_times):
+    """
+    Merge a day's booked intervals into sorted, non-overlapping runs.
+    
+    Returns:
+        (starts, ends) lists in minutes from midnight. Bookings that end at or before
+        their start (e.g., running past midnight) are dropped; they never block a slot.
+    """
+    starts, ends = [], []
+    for start, end in sorted((b['start_minutes'], b['end_minutes']) for b in booked_times):
+        if end <= start:
+            continue
+        if ends and start <= ends[-1]:
+            # Overlaps or touches the previous run
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _advance_cutoff_minutes(day_date, now):
+    """
+    Earliest slot start on day_date, in minutes from midnight, allowed by the
+    advance-booking rule (0 if the whole day is far enough ahead, 1440 if none of it is).
+    """
+    cutoff = now + timedelta(hours=Config.BOOKING_MIN_ADVANCE_HOURS)
+    if day_date < cutoff.date():
+        return 1440
+    if day_date > cutoff.date():
+        return 0
+    # Round up so a slot starting within the cutoff minute is excluded
+    return cutoff.hour * 60 + cutoff.minute + bool(cutoff.second or cutoff.microsecond)
+
 
 def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, selected_month, selected_day=None):
     """
@@ -18,37 +137,32 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
     
     Args:
         resource_id: ID of the resource
-        approved_bookings_raw: List of booking dictionaries from database
+        approved_bookings_raw: List of booking dictionaries from database, or None to
+            fetch only the approved bookings overlapping the displayed month/day
         selected_year: Year to display
         selected_month: Month to display
         selected_day: Optional day to display (for day view)
     
     Returns:
-        Dictionary with calendar_data, day_data, booked_slots, and navigation info
+        Dictionary with calendar_data, day_data, booked_slots, and navigation info.
+        In day view, approved_bookings and booked_slots cover bookings starting on the
+        selected day; in month view, approved_bookings holds thin entries (booking_id,
+        start/end strings, start_dt, date, status) and booked_slots is empty.
     """
-    # Fetch resource-specific operating hours
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT operating_hours_start, operating_hours_end, is_24_hours
-            FROM resources 
-            WHERE resource_id = ?
-        """, (resource_id,))
-        result = cursor.fetchone()
-        if result:
-            operating_hours_start = result['operating_hours_start']
-            operating_hours_end = result['operating_hours_end']
-            is_24_hours = bool(result['is_24_hours']) if result['is_24_hours'] is not None else False
-            if is_24_hours:
-                # For 24-hour operation, show all hours
-                operating_hours_start = 0
-                operating_hours_end = 23
-        else:
-            # Fallback to global config if resource not found
-            logger.warning(f"Resource {resource_id} not found, using global operating hours")
-            operating_hours_start = Config.BOOKING_OPERATING_HOURS_START
-            operating_hours_end = Config.BOOKING_OPERATING_HOURS_END
-            is_24_hours = False
+    # Fetch resource-specific operating hours (cached alongside booking validation)
+    operating_hours = get_operating_hours(resource_id)
+    if operating_hours:
+        operating_hours_start, operating_hours_end, is_24_hours = operating_hours
+        if is_24_hours:
+            # For 24-hour operation, show all hours
+            operating_hours_start = 0
+            operating_hours_end = 23
+    else:
+        # Fallback to global config if resource not found
+        logger.warning(f"Resource {resource_id} not found, using global operating hours")
+        operating_hours_start = Config.BOOKING_OPERATING_HOURS_START
+        operating_hours_end = Config.BOOKING_OPERATING_HOURS_END
+        is_24_hours = False
     
     now = datetime.now()
     today = now.date()
@@ -58,34 +172,6 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
         selected_year = today.year
         selected_month = today.month
     
-    # Calculate month boundaries
-    month_start = date(selected_year, selected_month, 1)
-    days_in_month = monthrange(selected_year, selected_month)[1]
-    month_end = date(selected_year, selected_month, days_in_month)
-    
-    # Generate calendar grid for the month (6 weeks x 7 days)
-    month_calendar = monthcalendar(selected_year, selected_month)
-    
-    # Calculate previous and next month
-    if selected_month == 1:
-        prev_year = selected_year - 1
-        prev_month = 12
-        next_year = selected_year
-        next_month = 2
-    elif selected_month == 12:
-        prev_year = selected_year
-        prev_month = 11
-        next_year = selected_year + 1
-        next_month = 1
-    else:
-        prev_year = selected_year
-        prev_month = selected_month - 1
-        next_year = selected_year
-        next_month = selected_month + 1
-    
-    # Check if we can navigate to previous month
-    can_go_prev = not (prev_year < today.year or (prev_year == today.year and prev_month < today.month))
-    
     # Calculate current time position for today's indicator (only in month view)
     current_time_info = None
     if selected_year == today.year and selected_month == today.month and not selected_day:
@@ -102,9 +188,53 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
                 'minutes_from_start': current_time_minutes - (operating_hours_start * 60)
             }
     
-    # Process bookings for calendar display
+    # Rendered calendars depend only on the key below (the bookings through their
+    # version counter), so repeat views of the same resource and month/day reuse them.
+    # Only database-fetched bookings are cached; a caller-supplied list has no version.
+    cache_key = None
+    if approved_bookings_raw is None:
+        cutoff_slot = None
+        if selected_day:
+            # Only the first slot index at or after the cutoff affects availability
+            cutoff_slot = -(-_advance_cutoff_minutes(date(selected_year, selected_month, selected_day), now) // 30)
+        cache_key = (get_database_path(), resource_id, selected_year, selected_month, selected_day, today,
+                     cutoff_slot, operating_hours, get_booking_version(resource_id))
+        cached = _get_cached_calendar(cache_key)
+        if cached is not None:
+            return {**cached, 'current_time_info': current_time_info}
+    
+    result = _build_calendar_data(resource_id, approved_bookings_raw, selected_year, selected_month, selected_day,
+                                  operating_hours_start, operating_hours_end, is_24_hours, now)
+    if cache_key is not None:
+        _store_cached_calendar(cache_key, result)
+    return {**result, 'current_time_info': current_time_info}
+
+
+def _build_calendar_data(resource_id, approved_bookings_raw, selected_year, selected_month, selected_day,
+                         operating_hours_start, operating_hours_end, is_24_hours, now):
+    """Build everything prepare_calendar_data() returns except current_time_info."""
+    today = now.date()
+    
+    # Calculate month boundaries
+    month_start = date(selected_year, selected_month, 1)
+    days_in_month = _days_in_month(selected_year, selected_month)
+    month_end = date(selected_year, selected_month, days_in_month)
+    
+    # Generate calendar grid for the month (6 weeks x 7 days)
+    month_calendar = _month_calendar(selected_year, selected_month)
+    
+    # Calculate previous and next month
+    prev_year, prev_month, next_year, next_month = _adjacent_months(selected_year, selected_month)
+    
+    # Check if we can navigate to previous month
+    can_go_prev = not (prev_year < today.year or (prev_year == today.year and prev_month < today.month))
+    
+    # Process bookings for calendar display. The day view needs full records for the
+    # selected day only; the month view only needs per-day counts, so it keeps thin
+    # entries and never builds slot data.
     approved_bookings = []
-    booked_slots = {}  # Key: date_iso, Value: list of {start_minutes, end_minutes}
+    booked_slots = {}  # Key: date_iso, Value: list of {start_minutes, end_minutes} (day view only)
+    bookings_count_by_date = Counter()
     
     # Calculate time range for bookings
     if selected_day:
@@ -115,127 +245,139 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
         range_start = datetime.combine(month_start, dt_time(0, 0))
         range_end = datetime.combine(month_end, dt_time(23, 59))
     
+    # Range bounds are Eastern wall-clock times; convert them to UTC once for the overlap test
+    range_start_utc = range_start.replace(tzinfo=_EST_TZ).astimezone(_UTC)
+    range_end_utc = range_end.replace(tzinfo=_EST_TZ).astimezone(_UTC)
+    
+    if approved_bookings_raw is None:
+        bookings_result = list_bookings_in_range(resource_id, range_start_utc, range_end_utc)
+        approved_bookings_raw = bookings_result['data']['bookings'] if bookings_result['success'] else []
+    
+    # ISO date prefixes for a cheap pre-filter; widened by a day on each side so a
+    # time stored with any UTC offset is never dropped by mistake
+    range_start_prefix = (range_start_utc.date() - timedelta(days=1)).isoformat()
+    range_end_prefix = (range_end_utc.date() + timedelta(days=1)).isoformat()
+    
     # Process each booking
     for booking in approved_bookings_raw:
-        if booking.get('start_datetime') and booking.get('end_datetime'):
+        start_str = booking.get('start_datetime')
+        end_str = booking.get('end_datetime')
+        if start_str and end_str:
+            # Skip bookings clearly outside the range without parsing them
+            if isinstance(start_str, str) and isinstance(end_str, str) and (
+                    end_str[:10] < range_start_prefix or start_str[:10] > range_end_prefix):
+                continue
             try:
-                # Parse and convert to EST
-                start_dt = parse_datetime_aware(booking['start_datetime'])
-                end_dt = parse_datetime_aware(booking['end_datetime'])
+                start_dt = parse_datetime_aware(start_str)
+                end_dt = parse_datetime_aware(end_str)
                 
+                # Only include bookings that overlap with the selected range; the
+                # rest are skipped before any EST conversion or formatting
+                if not (start_dt < range_end_utc and end_dt > range_start_utc):
+                    continue
                 start_dt_est = convert_to_est(start_dt)
-                end_dt_est = convert_to_est(end_dt)
                 
-                # Convert range_start and range_end to UTC for comparison
-                est_tz = gettz('America/New_York')
-                range_start_utc = range_start.replace(tzinfo=est_tz).astimezone(tzutc()) if range_start.tzinfo is None else range_start.astimezone(tzutc())
-                range_end_utc = range_end.replace(tzinfo=est_tz).astimezone(tzutc()) if range_end.tzinfo is None else range_end.astimezone(tzutc())
-                
-                # Only include bookings that overlap with the selected range
-                if start_dt < range_end_utc and end_dt > range_start_utc:
-                    # Store formatted booking
+                if not selected_day:
+                    # Month view: count per start day and keep a thin entry
+                    date_key = f"{start_dt_est.year:04d}-{start_dt_est.month:02d}-{start_dt_est.day:02d}"
+                    bookings_count_by_date[date_key] += 1
                     approved_bookings.append({
                         'booking_id': booking.get('booking_id'),
                         'start_datetime': booking['start_datetime'],
                         'end_datetime': booking['end_datetime'],
                         'start_dt': start_dt_est,
-                        'end_dt': end_dt_est,
-                        'date': start_dt_est.date().isoformat(),
-                        'start_time': start_dt_est.strftime('%H:%M'),
-                        'end_time': end_dt_est.strftime('%H:%M'),
-                        'start_hour': start_dt_est.hour,
-                        'end_hour': end_dt_est.hour,
-                        'start_minute': start_dt_est.minute,
-                        'end_minute': end_dt_est.minute,
-                        'weekday': start_dt_est.weekday(),
+                        'date': date_key,
                         'status': booking.get('status', 'approved')
                     })
-                    
-                    # Add to booked slots
-                    date_key = start_dt_est.date().isoformat()
-                    if date_key not in booked_slots:
-                        booked_slots[date_key] = []
-                    
-                    start_minutes = start_dt_est.hour * 60 + start_dt_est.minute
-                    end_minutes = end_dt_est.hour * 60 + end_dt_est.minute
-                    booked_slots[date_key].append({
-                        'start_minutes': start_minutes,
-                        'end_minutes': end_minutes,
-                        'start_time': start_dt_est.strftime('%H:%M'),
-                        'end_time': end_dt_est.strftime('%H:%M')
-                    })
+                    continue
+                
+                # Day view: a booking carried over from the previous day is listed
+                # under its start date, so it never appears on this day
+                if start_dt_est.date() != target_date:
+                    continue
+                end_dt_est = convert_to_est(end_dt)
+                
+                # Format each field once and share it between the booking and its slot
+                start_hour, start_minute = start_dt_est.hour, start_dt_est.minute
+                end_hour, end_minute = end_dt_est.hour, end_dt_est.minute
+                start_time = f"{start_hour:02d}:{start_minute:02d}"
+                end_time = f"{end_hour:02d}:{end_minute:02d}"
+                date_key = f"{start_dt_est.year:04d}-{start_dt_est.month:02d}-{start_dt_est.day:02d}"
+                
+                # Store formatted booking
+                approved_bookings.append({
+                    'booking_id': booking.get('booking_id'),
+                    'start_datetime': booking['start_datetime'],
+                    'end_datetime': booking['end_datetime'],
+                    'start_dt': start_dt_est,
+                    'end_dt': end_dt_est,
+                    'date': date_key,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'start_hour': start_hour,
+                    'end_hour': end_hour,
+                    'start_minute': start_minute,
+                    'end_minute': end_minute,
+                    'weekday': start_dt_est.weekday(),
+                    'status': booking.get('status', 'approved')
+                })
+                
+                # Add to booked slots
+                booked_slots.setdefault(date_key, []).append({
+                    'start_minutes': start_hour * 60 + start_minute,
+                    'end_minutes': end_hour * 60 + end_minute,
+                    'start_time': start_time,
+                    'end_time': end_time
+                })
             except (ValueError, TypeError, AttributeError) as e:
                 logger.warning(f"Skipping invalid booking date: {e}")
                 # Skip invalid dates
                 continue
     
     # Sort bookings by start time
-    approved_bookings.sort(key=lambda x: x['start_dt'] if 'start_dt' in x else datetime.now())
+    # Every entry built above has start_dt
+    approved_bookings.sort(key=itemgetter('start_dt'))
     
     # Generate calendar data based on view type
     if selected_day:
         # Day view - generate hourly slots for the selected day
         day_date = date(selected_year, selected_month, selected_day)
         date_key = day_date.isoformat()
-        day_bookings = [b for b in approved_bookings if b['date'] == date_key]
+        # Only bookings starting on this day were kept above, already in start order
+        day_bookings = approved_bookings
         booked_times = booked_slots.get(date_key, [])
         
         # Generate time slots from 12 AM (00:00) to 11:59 PM (23:59) for all resources
         # Slots outside operating hours will be marked as unavailable
         day_time_slots = []
         
-        # Always show all hours from 0 (12 AM) to 23 (11 PM)
-        for hour in range(0, 24):  # 0 to 23 (12 AM to 11 PM)
-            for minute in [0, 30]:
-                slot_start_minutes = hour * 60 + minute
-                slot_end_minutes = slot_start_minutes + 30
-                
-                # Check if slot is available
-                is_available = True
-                
-                # Check for booking conflicts
-                for booked in booked_times:
-                    if slot_start_minutes < booked['end_minutes'] and slot_end_minutes > booked['start_minutes']:
-                        is_available = False
-                        break
-                
-                # For non-24-hour resources, mark slots outside operating hours as unavailable
-                if not is_24_hours:
-                    # Slot must start at or after operating hours start
-                    if slot_start_minutes < (operating_hours_start * 60):
-                        is_available = False
-                    
-                    # Slot must end at or before operating hours end
-                    # If end time is 22:00 (10 PM), slot ending at 22:30 is not allowed
-                    if slot_end_minutes > (operating_hours_end * 60):
-                        is_available = False
-                    
-                    # Also check if slot starts at or after the closing time
-                    if slot_start_minutes >= (operating_hours_end * 60):
-                        is_available = False
-                
-                # Only show slots at least configured advance hours in the future from now
-                min_advance_hours = Config.BOOKING_MIN_ADVANCE_HOURS
-                slot_datetime = datetime.combine(day_date, dt_time(hour=hour, minute=minute))
-                if slot_datetime < now + timedelta(hours=min_advance_hours):
-                    is_available = False
-                
-                # For the last slot of the day (23:30), end time should be 23:59 instead of 00:00 (next day)
-                display_end_hour = slot_end_minutes // 60
-                display_end_minute = slot_end_minutes % 60
-                if slot_end_minutes >= 1440:  # If it would roll over to next day
-                    display_end_hour = 23
-                    display_end_minute = 59
-                
-                day_time_slots.append({
-                    'hour': hour,
-                    'minute': minute,
-                    'time_minutes': slot_start_minutes,
-                    'start_time': f"{hour:02d}:{minute:02d}",
-                    'end_time': f"{display_end_hour:02d}:{display_end_minute:02d}",
-                    'is_available': is_available,
-                    'is_booked': not is_available
-                })
+        # Booked intervals merged into sorted, disjoint runs: a slot overlaps a
+        # booking iff the last run starting before the slot ends also ends after
+        # the slot starts
+        booked_starts, booked_ends = _merge_booked_intervals(booked_times)
+        
+        # Earliest bookable slot start and latest slot end, in minutes from midnight.
+        # Slots must start at least the configured advance hours from now; for
+        # non-24-hour resources they must also fit within operating hours.
+        cutoff_minutes = _advance_cutoff_minutes(day_date, now)
+        if is_24_hours:
+            earliest_start_minutes = cutoff_minutes
+            latest_end_minutes = 1440
+        else:
+            earliest_start_minutes = max(operating_hours_start * 60, cutoff_minutes)
+            latest_end_minutes = operating_hours_end * 60
+        
+        for template in _DAY_SLOT_TEMPLATE:
+            slot_start_minutes = template['time_minutes']
+            slot_end_minutes = slot_start_minutes + 30
+            
+            # Check if slot is bookable and free of booking conflicts
+            is_available = earliest_start_minutes <= slot_start_minutes and slot_end_minutes <= latest_end_minutes
+            if is_available:
+                candidates = bisect_left(booked_starts, slot_end_minutes)
+                is_available = not (candidates and booked_ends[candidates - 1] > slot_start_minutes)
+            
+            day_time_slots.append({**template, 'is_available': is_available, 'is_booked': not is_available})
         
         day_data = {
             'date': day_date,
@@ -254,6 +396,10 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
         month_calendar = None
     else:
         # Month view - generate calendar grid
+        # Compare days as ordinals and build date keys from the month prefix
+        today_ord = today.toordinal()
+        month_start_ord = month_start.toordinal()
+        month_prefix = f"{selected_year:04d}-{selected_month:02d}-"
         calendar_grid = []
         for week in month_calendar:
             week_row = []
@@ -261,14 +407,14 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
                 if day_num == 0:
                     week_row.append(None)
                 else:
-                    day_date = date(selected_year, selected_month, day_num)
-                    date_key = day_date.isoformat()
-                    day_bookings = [b for b in approved_bookings if b['date'] == date_key]
-                    booked_count = len(day_bookings)
+                    day_ord = month_start_ord + day_num - 1
+                    day_date = date.fromordinal(day_ord)
+                    date_key = f"{month_prefix}{day_num:02d}"
+                    booked_count = bookings_count_by_date[date_key]
                     
-                    is_past = day_date < today
-                    is_today = day_date == today
-                    is_selectable = day_date >= today
+                    is_past = day_ord < today_ord
+                    is_today = day_ord == today_ord
+                    is_selectable = not is_past
                     
                     week_row.append({
                         'day': day_num,
@@ -294,7 +440,6 @@ def prepare_calendar_data(resource_id, approved_bookings_raw, selected_year, sel
         'prev_month': prev_month,
         'next_year': next_year,
         'next_month': next_month,
-        'can_go_prev': can_go_prev,
-        'current_time_info': current_time_info
+        'can_go_prev': can_go_prev
     }
 
@@ -1,26 +1,213 @@
 """
 Messaging service with thread management.
 """
-from src.data_access.database import get_db_connection
+import hashlib
+import struct
+import time
+from functools import lru_cache
+from src.data_access.database import get_db_connection, get_database_path
+
+# Hot-path SQL is fixed module-level text so sqlite3's per-connection statement
+# cache (keyed by SQL text) reuses the prepared statements across calls.
+_SQL_INSERT_MESSAGE = """
+    INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id, booking_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+    RETURNING message_id
+"""
+
+# Rows that already have the requested status are left untouched (no page write)
+_SQL_UPSERT_THREAD_READ = """
+    INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id, thread_id) DO UPDATE SET
+        is_read = excluded.is_read,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE thread_read.is_read IS NOT excluded.is_read
+"""
+
+# Sets a user's read status for a thread only if they take part in it, so one
+# statement does the access check and the write (rowcount 0 means no access).
+# Unchanged rows still count as updated but keep updated_at.
+_SQL_SET_THREAD_READ_FOR_PARTICIPANT = """
+    INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
+    SELECT ?, ?, ?, CURRENT_TIMESTAMP
+    WHERE EXISTS (
+        SELECT 1 FROM messages
+        WHERE thread_id = ?
+        AND (sender_id = ? OR receiver_id = ?)
+        AND deleted = 0
+    )
+    ON CONFLICT(user_id, thread_id) DO UPDATE SET
+        is_read = excluded.is_read,
+        updated_at = CASE
+            WHEN thread_read.is_read IS excluded.is_read THEN thread_read.updated_at
+            ELSE CURRENT_TIMESTAMP
+        END
+"""
+
+# Whether a thread exists and the user takes part in it
+_SQL_THREAD_ACCESS = """
+    SELECT 1 FROM messages
+    WHERE thread_id = ?
+    AND (sender_id = ? OR receiver_id = ?)
+    AND deleted = 0
+    LIMIT 1
+"""
+
+# All messages of the conversation a thread_id belongs to (across legacy thread_ids),
+# resolving its participant pair and resource from one of the thread's messages
+_THREAD_MESSAGES_BASE = """
+    SELECT m.message_id, m.thread_id, m.sender_id, m.receiver_id, m.resource_id,
+           m.booking_id, m.content, m.timestamp, m.read, m.deleted
+    FROM messages m
+    JOIN (
+        SELECT user_a_id, user_b_id, resource_id
+        FROM messages
+        WHERE thread_id = ?
+        AND (sender_id = ? OR receiver_id = ?)
+        AND deleted = 0
+        LIMIT 1
+    ) t
+    WHERE m.user_a_id = t.user_a_id
+    AND m.user_b_id = t.user_b_id
+    AND m.resource_id IS t.resource_id
+    AND m.deleted = 0"""
+
+# (paged, before_cursor) -> SQL. Pages are read newest first so LIMIT keeps the latest
+# messages; the cursor is a keyset on (timestamp, message_id) so messages sharing a
+# timestamp are not skipped.
+_THREAD_MESSAGES_QUERIES = {
+    (False, False): _THREAD_MESSAGES_BASE + "\n    ORDER BY m.timestamp ASC, m.message_id ASC",
+    (True, False): _THREAD_MESSAGES_BASE + "\n    ORDER BY m.timestamp DESC, m.message_id DESC LIMIT ?",
+    (True, True): _THREAD_MESSAGES_BASE + """
+    AND (m.timestamp, m.message_id) < (SELECT timestamp, message_id FROM messages WHERE message_id = ?)
+    ORDER BY m.timestamp DESC, m.message_id DESC LIMIT ?""",
+}
+
+_SQL_CONVERSATION_THREAD_IDS = """
+    SELECT DISTINCT thread_id
+    FROM messages
+    WHERE user_a_id = ? AND user_b_id = ?
+    AND resource_id IS ?
+    AND deleted = 0
+"""
+
+# One row per (other_user_id, resource_id) conversation of a user: its latest message,
+# read status across all of its thread_ids, and the other user and resource
+_SQL_LIST_THREADS = """
+    WITH conv AS (
+        SELECT m.message_id,
+               m.thread_id,
+               m.content,
+               m.timestamp,
+               m.resource_id,
+               CASE 
+                   WHEN m.sender_id = ? THEN m.receiver_id
+                   ELSE m.sender_id
+               END as other_user_id
+        FROM messages m
+        WHERE (m.sender_id = ? OR m.receiver_id = ?)
+        AND m.deleted = 0
+    ),
+    latest AS (
+        SELECT conv.*,
+               ROW_NUMBER() OVER (
+                   PARTITION BY other_user_id, resource_id
+                   ORDER BY timestamp DESC, message_id DESC
+               ) as rn
+        FROM conv
+    ),
+    read_status AS (
+        SELECT c.other_user_id,
+               c.resource_id,
+               MAX(tr.is_read = 0) OR NOT MAX(tr.is_read = 1) as is_unread
+        FROM (SELECT DISTINCT other_user_id, resource_id, thread_id FROM conv) c
+        JOIN thread_read tr ON tr.thread_id = c.thread_id AND tr.user_id = ?
+        GROUP BY c.other_user_id, c.resource_id
+    )
+    SELECT l.thread_id,
+           l.other_user_id,
+           l.resource_id,
+           l.content as last_message,
+           l.timestamp as last_message_time,
+           COALESCE(rs.is_unread, 1) as is_unread,
+           u.name as other_user_name,
+           u.email as other_user_email,
+           u.profile_image as other_user_profile_image,
+           r.title as resource_title
+    FROM latest l
+    LEFT JOIN read_status rs ON rs.other_user_id = l.other_user_id AND rs.resource_id IS l.resource_id
+    LEFT JOIN users u ON u.user_id = l.other_user_id AND (u.deleted = 0 OR u.deleted IS NULL)
+    LEFT JOIN resources r ON r.resource_id = l.resource_id
+    WHERE l.rn = 1
+    ORDER BY l.timestamp DESC
+    LIMIT ? OFFSET ?
+"""
+
+# Distinct thread_ids of a user's messages without a read row (missing rows count as unread)
+_SQL_UNREAD_COUNT = """
+    SELECT COUNT(*)
+    FROM (
+        SELECT DISTINCT thread_id
+        FROM messages
+        WHERE (sender_id = ? OR receiver_id = ?)
+        AND deleted = 0
+    ) m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM thread_read tr
+        WHERE tr.user_id = ? AND tr.thread_id = m.thread_id AND tr.is_read = 1
+    )
+"""
 
 def generate_thread_id(user1_id, user2_id, resource_id=None):
     """Generate deterministic thread ID from two user IDs and optional resource_id.
     
     If resource_id is provided, each (user1, user2, resource) combination gets a unique thread.
     If resource_id is None, falls back to user-only threading (legacy support).
-    """
-    smaller_id = min(user1_id, user2_id)
-    larger_id = max(user1_id, user2_id)
     
+    The ID is a BLAKE2b digest of the packed IDs, so it is the same in every process
+    (built-in hash() of a string is randomized per process).
+    """
+    return _thread_id_for_pair(min(user1_id, user2_id), max(user1_id, user2_id), resource_id)
+
+@lru_cache(maxsize=8192)
+def _thread_id_for_pair(smaller_id, larger_id, resource_id):
+    """Thread ID for an already-ordered user pair; memoized since it is a pure function."""
     if resource_id is not None:
         # Thread per resource: (user1, user2, resource_id)
-        thread_id = hash(f"{smaller_id}_{larger_id}_{resource_id}")
+        key = struct.pack('<qqq', smaller_id, larger_id, resource_id)
     else:
         # Legacy: thread per user pair only
-        thread_id = hash(f"{smaller_id}_{larger_id}")
+        key = struct.pack('<qq', smaller_id, larger_id)
+    
+    digest = hashlib.blake2b(key, digest_size=8, person=b'thread').digest()
+    # Positive and at most 10 digits, like existing thread IDs
+    return int.from_bytes(digest, 'little') % (10 ** 10)
+
+# Unread thread counts (rendered on most pages) and full thread lists (the inbox),
+# keyed by (database path, user_id). Messaging writes drop the affected users' entries
+# after committing; the TTL bounds staleness from other processes and from user or
+# resource renames. Plain dict reads and writes are atomic.
+_UNREAD_COUNT_TTL_SECONDS = 30
+_unread_count_cache = {}
+_THREAD_LIST_TTL_SECONDS = 30
+_thread_list_cache = {}
+
+def _invalidate_thread_caches(*user_ids):
+    """Drop cached unread counts and thread lists for users whose threads or read status changed."""
+    db_path = get_database_path()
+    for user_id in user_ids:
+        _unread_count_cache.pop((db_path, user_id), None)
+        _thread_list_cache.pop((db_path, user_id), None)
+
+def _upsert_thread_read_many(cursor, user_id, thread_ids, is_read):
+    """Set a user's read status for the given thread_ids, creating rows as needed.
     
-    # Ensure positive integer
-    return abs(thread_id) % (10 ** 10)
+    Rows that already have the requested status are left untouched (no page write),
+    which is the common case when messages keep arriving in an unread thread, so
+    updated_at records the last status change.
+    """
+    cursor.executemany(_SQL_UPSERT_THREAD_READ, [(user_id, thread_id, int(is_read)) for thread_id in thread_ids])
 
 def send_message(sender_id, receiver_id, content, resource_id=None, booking_id=None):
     """Send a message between two users, optionally about a specific resource or booking.
@@ -48,249 +235,139 @@ def send_message(sender_id, receiver_id, content, resource_id=None, booking_id=N
     # This prevents double-escaping which causes HTML entities to display incorrectly
     thread_id = generate_thread_id(sender_id, receiver_id, resource_id)
     
+    # The insert and the thread_read upsert share one transaction;
+    # get_db_connection commits once on exit (a single WAL flush)
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id, booking_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (thread_id, sender_id, receiver_id, content, resource_id, booking_id))
-        
-        message_id = cursor.lastrowid
+        cursor.execute(_SQL_INSERT_MESSAGE, (thread_id, sender_id, receiver_id, content, resource_id, booking_id))
+        message_id = cursor.fetchone()['message_id']
         
         # When a new message is sent, mark the thread as unread for the receiver
         # This ensures new messages are always marked as unread
-        cursor.execute("""
-            INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
-            VALUES (?, ?, 0, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_id, thread_id) DO UPDATE SET
-                is_read = 0,
-                updated_at = CURRENT_TIMESTAMP
-        """, (receiver_id, thread_id))
-        conn.commit()
+        _upsert_thread_read_many(cursor, receiver_id, [thread_id], is_read=False)
     
+    # A new thread also counts as unread for the sender until they open it
+    _invalidate_thread_caches(sender_id, receiver_id)
     return {'success': True, 'data': {'message_id': message_id, 'thread_id': thread_id}}
 
-def get_thread_messages(thread_id, user_id):
+def get_thread_messages(thread_id, user_id, limit=None, before_message_id=None):
     """Get all messages in a thread for a user. Automatically marks the thread as read when opened.
     
     This function consolidates messages across all thread_ids for the same (other_user_id, resource_id)
     combination to ensure all messages are shown even if they have different legacy thread_ids.
+    
+    Args:
+        thread_id: Any thread_id of the conversation
+        user_id: User opening the thread (must be a participant)
+        limit: Optional page size; returns the most recent messages only
+        before_message_id: Optional cursor; only messages sent before this one are returned
+            (pass the first message_id of the previous page to load older messages)
+    
+    Returns:
+        messages in chronological order, and has_more (older messages remain) when limit is given
     """
+    paged = limit is not None or before_message_id is not None
+    values = [thread_id, user_id, user_id]
+    if before_message_id is not None:
+        values.append(before_message_id)
+    if paged:
+        # One extra row tells if there are more
+        values.append(limit + 1 if limit is not None else -1)
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        # First, get one message to determine other_user_id and resource_id
-        cursor.execute("""
-            SELECT sender_id, receiver_id, resource_id
-            FROM messages
-            WHERE thread_id = ?
-            AND (sender_id = ? OR receiver_id = ?)
-            AND deleted = 0
-            LIMIT 1
-        """, (thread_id, user_id, user_id))
-        
-        first_message = cursor.fetchone()
-        if not first_message:
-            return {'success': False, 'error': 'Thread not found or access denied'}
-        
-        # Determine other_user_id and resource_id
-        if first_message['sender_id'] == user_id:
-            other_user_id = first_message['receiver_id']
-        else:
-            other_user_id = first_message['sender_id']
-        resource_id = first_message['resource_id']
-        
-        # Get all messages for this (other_user_id, resource_id) combination across all thread_ids
-        # This consolidates messages that may have different thread_ids due to legacy data
-        cursor.execute("""
-            SELECT * FROM messages
-            WHERE (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
-            AND deleted = 0
-            ORDER BY timestamp ASC
-        """, (user_id, user_id, other_user_id, other_user_id, resource_id, resource_id))
+        # Get all messages for the thread's (other_user_id, resource_id) combination across
+        # all thread_ids. This consolidates messages that may have different thread_ids
+        # due to legacy data
+        cursor.execute(_THREAD_MESSAGES_QUERIES[(paged, before_message_id is not None)], values)
         
         messages = [dict(row) for row in cursor.fetchall()]
-        
-        # Mark all thread_ids for this user-resource combination as read
-        # Get all thread_ids for this combination
-        cursor.execute("""
-            SELECT DISTINCT thread_id
-            FROM messages
-            WHERE (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
-            AND deleted = 0
-        """, (user_id, user_id, other_user_id, other_user_id, resource_id, resource_id))
-        
-        thread_ids = [row['thread_id'] for row in cursor.fetchall()]
-        
-        # Mark all thread_ids as read
-        for tid in thread_ids:
-            cursor.execute("""
-                INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
-                VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-                ON CONFLICT(user_id, thread_id) DO UPDATE SET
-                    is_read = 1,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (user_id, tid))
-        conn.commit()
-    
-    return {'success': True, 'data': {'messages': messages}}
+        if not paged:
+            if not messages:
+                return {'success': False, 'error': 'Thread not found or access denied'}
+            # Mark all thread_ids for this user-resource combination as read
+            thread_ids = list(dict.fromkeys(message['thread_id'] for message in messages))
+            # Mark all thread_ids as read (one statement, one transaction)
+            _upsert_thread_read_many(cursor, user_id, thread_ids, is_read=True)
+            conn.commit()
+            _invalidate_thread_caches(user_id)
+            return {'success': True, 'data': {'messages': messages}}
+        
+        has_more = limit is not None and len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()
+        
+        if not messages:
+            # An empty older page is fine as long as the user can see the thread
+            cursor.execute(_SQL_THREAD_ACCESS, (thread_id, user_id, user_id))
+            if not cursor.fetchone():
+                return {'success': False, 'error': 'Thread not found or access denied'}
+        elif before_message_id is None:
+            # Opening the latest page marks every thread_id of the conversation read,
+            # including ones only found on older pages
+            first_message = messages[0]
+            cursor.execute(_SQL_CONVERSATION_THREAD_IDS, (min(first_message['sender_id'], first_message['receiver_id']),
+                  max(first_message['sender_id'], first_message['receiver_id']),
+                  first_message['resource_id']))
+            thread_ids = [row['thread_id'] for row in cursor.fetchall()]
+            _upsert_thread_read_many(cursor, user_id, thread_ids, is_read=True)
+            conn.commit()
+            _invalidate_thread_caches(user_id)
+    
+    return {'success': True, 'data': {'messages': messages, 'has_more': has_more}}
 
-def list_threads(user_id):
+def list_threads(user_id, limit=None, offset=0):
     """List all message threads for a user, including resource information and thread read status.
     
     Threads are consolidated by (other_user_id, resource_id) combination, so there's only
     one thread per user-resource pair, regardless of legacy thread_ids.
+    
+    Args:
+        user_id: User whose threads to list
+        limit: Optional page size (most recently active threads first); None returns all
+        offset: Number of threads to skip
+    
+    The full list (no limit or offset) is cached briefly per user and dropped whenever
+    messaging changes it; callers get their own copies of the thread dicts.
     """
+    cache_key = None
+    if limit is None and not offset:
+        cache_key = (get_database_path(), user_id)
+        now = time.monotonic()
+        cached = _thread_list_cache.get(cache_key)
+        if cached is not None and now - cached[0] < _THREAD_LIST_TTL_SECONDS:
+            return {'success': True, 'data': {'threads': [dict(thread) for thread in cached[1]]}}
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        # Get all messages for the user, grouped by (other_user_id, resource_id)
-        # This consolidates threads that may have different thread_ids due to legacy data
-        cursor.execute("""
-            SELECT 
-                   CASE 
-                       WHEN m.sender_id = ? THEN m.receiver_id
-                       ELSE m.sender_id
-                   END as other_user_id,
-                   m.resource_id,
-                   MAX(m.timestamp) as last_message_time
-            FROM messages m
-            WHERE (m.sender_id = ? OR m.receiver_id = ?)
-            AND m.deleted = 0
-            GROUP BY 
-                CASE 
-                    WHEN m.sender_id = ? THEN m.receiver_id
-                    ELSE m.sender_id
-                END,
-                m.resource_id
-        """, (user_id, user_id, user_id, user_id))
-        
-        # Get the latest message for each (other_user_id, resource_id) combination
-        consolidated_threads = {}
-        for row in cursor.fetchall():
-            other_user_id = row['other_user_id']
-            resource_id = row['resource_id']
-            last_message_time = row['last_message_time']
-            
-            # Get the actual latest message with full details
-            cursor.execute("""
-                SELECT m.thread_id,
-                       m.content as last_message,
-                       m.timestamp as last_message_time,
-                       m.resource_id,
-                       CASE 
-                           WHEN m.sender_id = ? THEN m.receiver_id
-                           ELSE m.sender_id
-                       END as other_user_id
-                FROM messages m
-                WHERE (m.sender_id = ? OR m.receiver_id = ?)
-                AND m.deleted = 0
-                AND (
-                    CASE 
-                        WHEN m.sender_id = ? THEN m.receiver_id
-                        ELSE m.sender_id
-                    END = ?
-                )
-                AND (m.resource_id = ? OR (? IS NULL AND m.resource_id IS NULL))
-                AND m.timestamp = ?
-                ORDER BY m.timestamp DESC
-                LIMIT 1
-            """, (user_id, user_id, user_id, user_id, other_user_id, resource_id, resource_id, last_message_time))
-            
-            message_row = cursor.fetchone()
-            if message_row:
-                # Create a unique key for this user-resource combination
-                thread_key = f"{other_user_id}_{resource_id if resource_id else 'NULL'}"
-                
-                # Get read status for all thread_ids matching this user-resource combination
-                # A thread is unread if ANY of its thread_ids are unread
-                cursor.execute("""
-                    SELECT DISTINCT m.thread_id
-                    FROM messages m
-                    WHERE (m.sender_id = ? OR m.receiver_id = ?)
-                    AND m.deleted = 0
-                    AND (
-                        CASE 
-                            WHEN m.sender_id = ? THEN m.receiver_id
-                            ELSE m.sender_id
-                        END = ?
-                    )
-                    AND (m.resource_id = ? OR (? IS NULL AND m.resource_id IS NULL))
-                """, (user_id, user_id, user_id, other_user_id, resource_id, resource_id))
-                
-                thread_ids = [row['thread_id'] for row in cursor.fetchall()]
-                
-                # Check if any thread_id is unread
-                is_unread = False
-                if thread_ids:
-                    placeholders = ','.join(['?'] * len(thread_ids))
-                    cursor.execute(f"""
-                        SELECT COUNT(*) as unread_count
-                        FROM thread_read tr
-                        WHERE tr.thread_id IN ({placeholders})
-                        AND tr.user_id = ?
-                        AND tr.is_read = 0
-                    """, thread_ids + [user_id])
-                    
-                    unread_result = cursor.fetchone()
-                    if unread_result and unread_result['unread_count'] > 0:
-                        is_unread = True
-                    else:
-                        # If no thread_read entries exist for any of these thread_ids, default to unread
-                        cursor.execute(f"""
-                            SELECT COUNT(*) as read_count
-                            FROM thread_read tr
-                            WHERE tr.thread_id IN ({placeholders})
-                            AND tr.user_id = ?
-                            AND tr.is_read = 1
-                        """, thread_ids + [user_id])
-                        
-                        read_result = cursor.fetchone()
-                        # If no read entries exist, thread is unread
-                        if not read_result or read_result['read_count'] == 0:
-                            is_unread = True
-                
-                consolidated_threads[thread_key] = {
-                    'thread_id': message_row['thread_id'],  # Use the thread_id of the latest message
-                    'other_user_id': other_user_id,
-                    'resource_id': resource_id,
-                    'last_message': message_row['last_message'],
-                    'last_message_time': message_row['last_message_time'],
-                    'is_unread': is_unread
-                }
-        
-        # Convert to list and enrich with user/resource info
+        # One pass over the user's messages, grouped by (other_user_id, resource_id):
+        # the latest message of each group, the read status across all of the group's
+        # thread_ids (legacy data may have several), and the other user and resource.
+        # A thread is unread if ANY of its thread_ids are unread, or if none has been read
+        # (including when there are no thread_read rows at all).
+        cursor.execute(_SQL_LIST_THREADS, (user_id, user_id, user_id, user_id, -1 if limit is None else limit, offset))
+        
         threads = []
-        for thread_key, thread in consolidated_threads.items():
-            # Get other user info (handle deleted users)
-            other_user_id = thread['other_user_id']
-            cursor.execute("SELECT name, email, profile_image FROM users WHERE user_id = ? AND (deleted = 0 OR deleted IS NULL)", (other_user_id,))
-            other_user = cursor.fetchone()
-            if other_user:
-                thread['other_user_name'] = other_user['name'] or '[Deleted User]'
-                thread['other_user_email'] = other_user['email'] or '[Deleted]'
-                thread['other_user_profile_image'] = other_user['profile_image']
-            else:
-                thread['other_user_name'] = '[Deleted User]'
-                thread['other_user_email'] = '[Deleted]'
-                thread['other_user_profile_image'] = None
-            
-            # Get resource info if resource_id exists
-            if thread.get('resource_id'):
-                cursor.execute("SELECT resource_id, title FROM resources WHERE resource_id = ?", (thread['resource_id'],))
-                resource = cursor.fetchone()
-                if resource:
-                    thread['resource_title'] = resource['title']
-                    thread['resource_id'] = resource['resource_id']
-            
+        for row in cursor.fetchall():
+            thread = {
+                'thread_id': row['thread_id'],  # Use the thread_id of the latest message
+                'other_user_id': row['other_user_id'],
+                'resource_id': row['resource_id'],
+                'last_message': row['last_message'],
+                'last_message_time': row['last_message_time'],
+                'is_unread': bool(row['is_unread']),
+                # Deleted (or missing) users don't join
+                'other_user_name': row['other_user_name'] or '[Deleted User]',
+                'other_user_email': row['other_user_email'] or '[Deleted]',
+                'other_user_profile_image': row['other_user_profile_image']
+            }
+            if row['resource_id'] and row['resource_title'] is not None:
+                thread['resource_title'] = row['resource_title']
             threads.append(thread)
-        
-        # Sort by last_message_time descending
-        threads.sort(key=lambda t: t['last_message_time'], reverse=True)
     
+    if cache_key is not None:
+        _thread_list_cache[cache_key] = (now, [dict(thread) for thread in threads])
     return {'success': True, 'data': {'threads': threads}}
 
 def delete_message(message_id, user_id):
@@ -309,6 +386,7 @@ def delete_message(message_id, user_id):
         
         cursor.execute("UPDATE messages SET deleted = 1 WHERE message_id = ?", (message_id,))
         conn.commit()
+        _invalidate_thread_caches(message['sender_id'], message['receiver_id'])
     
     return {'success': True, 'data': {'message_id': message_id}}
 
@@ -343,14 +421,14 @@ def delete_thread(thread_id, user_id):
         cursor.execute("""
             UPDATE messages 
             SET deleted = 1 
-            WHERE (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
+            WHERE user_a_id = ? AND user_b_id = ?
+            AND resource_id IS ?
             AND deleted = 0
-        """, (user_id, user_id, other_user_id, other_user_id, resource_id, resource_id))
+        """, (min(user_id, other_user_id), max(user_id, other_user_id), resource_id))
         
         deleted_count = cursor.rowcount
         conn.commit()
+        _invalidate_thread_caches(user_id, other_user_id)
     
     return {'success': True, 'data': {'thread_id': thread_id, 'deleted_count': deleted_count}}
 
@@ -366,113 +444,56 @@ def get_deleted_threads(admin_user_id, limit=100, offset=0):
             return {'success': False, 'error': 'Admin access required'}
         
         # Find all unique (user1_id, user2_id, resource_id) combinations that have deleted messages
-        # This represents deleted threads
+        # This represents deleted threads. One pass gives each one's latest deleted message
+        # and deleted count, with both users' names and the resource title joined in.
         cursor.execute("""
-            SELECT DISTINCT
-                CASE 
-                    WHEN m1.sender_id < m1.receiver_id THEN m1.sender_id
-                    ELSE m1.receiver_id
-                END as user1_id,
-                CASE 
-                    WHEN m1.sender_id < m1.receiver_id THEN m1.receiver_id
-                    ELSE m1.sender_id
-                END as user2_id,
-                m1.resource_id,
-                MAX(m1.timestamp) as last_message_time
-            FROM messages m1
-            WHERE m1.deleted = 1
-            GROUP BY 
-                CASE 
-                    WHEN m1.sender_id < m1.receiver_id THEN m1.sender_id
-                    ELSE m1.receiver_id
-                END,
-                CASE 
-                    WHEN m1.sender_id < m1.receiver_id THEN m1.receiver_id
-                    ELSE m1.sender_id
-                END,
-                m1.resource_id
-            ORDER BY last_message_time DESC
+            WITH deleted AS (
+                SELECT m.user_a_id,
+                       m.user_b_id,
+                       m.resource_id,
+                       m.thread_id,
+                       m.content,
+                       m.timestamp,
+                       COUNT(*) OVER thread as deleted_count,
+                       ROW_NUMBER() OVER (thread ORDER BY m.timestamp DESC, m.message_id DESC) as rn
+                FROM messages m
+                WHERE m.deleted = 1
+                WINDOW thread AS (PARTITION BY m.user_a_id, m.user_b_id, m.resource_id)
+            )
+            SELECT d.thread_id,
+                   d.user_a_id as user1_id,
+                   d.user_b_id as user2_id,
+                   u1.name as user1_name,
+                   u2.name as user2_name,
+                   d.resource_id,
+                   r.title as resource_title,
+                   d.content as last_message,
+                   d.timestamp as last_message_time,
+                   d.deleted_count
+            FROM deleted d
+            LEFT JOIN users u1 ON u1.user_id = d.user_a_id
+            LEFT JOIN users u2 ON u2.user_id = d.user_b_id
+            LEFT JOIN resources r ON r.resource_id = d.resource_id
+            WHERE d.rn = 1
+            ORDER BY d.timestamp DESC
             LIMIT ? OFFSET ?
         """, (limit, offset))
         
-        thread_keys = cursor.fetchall()
         threads = []
-        
-        for row in thread_keys:
-            user1_id = row['user1_id']
-            user2_id = row['user2_id']
-            resource_id = row['resource_id']
-            last_message_time = row['last_message_time']
-            
-            # Get one message to determine thread_id
-            cursor.execute("""
-                SELECT thread_id, content, sender_id, receiver_id
-                FROM messages
-                WHERE ((sender_id = ? AND receiver_id = ?) OR (sender_id = ? AND receiver_id = ?))
-                AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
-                AND deleted = 1
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """, (user1_id, user2_id, user2_id, user1_id, resource_id, resource_id))
-            
-            message = cursor.fetchone()
-            if not message:
-                continue
-            
-            thread_id = message['thread_id']
-            last_message = message['content']
-            
-            # Get user names
-            cursor.execute("SELECT name, email FROM users WHERE user_id = ?", (user1_id,))
-            user1 = cursor.fetchone()
-            cursor.execute("SELECT name, email FROM users WHERE user_id = ?", (user2_id,))
-            user2 = cursor.fetchone()
-            
-            user1_name = user1['name'] if user1 else '[Deleted User]'
-            user2_name = user2['name'] if user2 else '[Deleted User]'
-            
-            # Get resource title if applicable
-            resource_title = None
-            if resource_id:
-                cursor.execute("SELECT title FROM resources WHERE resource_id = ?", (resource_id,))
-                resource = cursor.fetchone()
-                if resource:
-                    resource_title = resource['title']
-            
-            # Count deleted messages in this thread
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM messages
-                WHERE ((sender_id = ? AND receiver_id = ?) OR (sender_id = ? AND receiver_id = ?))
-                AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
-                AND deleted = 1
-            """, (user1_id, user2_id, user2_id, user1_id, resource_id, resource_id))
-            
-            deleted_count = cursor.fetchone()['count']
-            
-            threads.append({
-                'thread_id': thread_id,
-                'user1_id': user1_id,
-                'user2_id': user2_id,
-                'user1_name': user1_name,
-                'user2_name': user2_name,
-                'resource_id': resource_id,
-                'resource_title': resource_title,
-                'last_message': last_message,
-                'last_message_time': last_message_time,
-                'deleted_count': deleted_count
-            })
+        for row in cursor.fetchall():
+            thread = dict(row)
+            thread['user1_name'] = thread['user1_name'] or '[Deleted User]'
+            thread['user2_name'] = thread['user2_name'] or '[Deleted User]'
+            threads.append(thread)
         
         # Get total count
         cursor.execute("""
-            SELECT COUNT(DISTINCT 
-                CASE 
-                    WHEN sender_id < receiver_id THEN sender_id || '-' || receiver_id || '-' || COALESCE(CAST(resource_id AS TEXT), 'NULL')
-                    ELSE receiver_id || '-' || sender_id || '-' || COALESCE(CAST(resource_id AS TEXT), 'NULL')
-                END
-            ) as count
-            FROM messages
-            WHERE deleted = 1
+            SELECT COUNT(*) as count
+            FROM (
+                SELECT 1 FROM messages
+                WHERE deleted = 1
+                GROUP BY user_a_id, user_b_id, resource_id
+            )
         """)
         total = cursor.fetchone()['count']
     
@@ -513,11 +534,10 @@ def restore_thread(thread_id, user_id):
         cursor.execute("""
             SELECT COUNT(*) as count
             FROM messages
-            WHERE (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
+            WHERE user_a_id = ? AND user_b_id = ?
+            AND resource_id IS ?
             AND deleted = 1
-        """, (user_id, user_id, other_user_id, other_user_id, resource_id, resource_id))
+        """, (min(user_id, other_user_id), max(user_id, other_user_id), resource_id))
         
         result = cursor.fetchone()
         if not result or result['count'] == 0:
@@ -527,14 +547,14 @@ def restore_thread(thread_id, user_id):
         cursor.execute("""
             UPDATE messages 
             SET deleted = 0 
-            WHERE (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
+            WHERE user_a_id = ? AND user_b_id = ?
+            AND resource_id IS ?
             AND deleted = 1
-        """, (user_id, user_id, other_user_id, other_user_id, resource_id, resource_id))
+        """, (min(user_id, other_user_id), max(user_id, other_user_id), resource_id))
         
         restored_count = cursor.rowcount
         conn.commit()
+        _invalidate_thread_caches(user_id, other_user_id)
     
     return {'success': True, 'data': {'thread_id': thread_id, 'restored_count': restored_count}}
 
@@ -558,15 +578,25 @@ def restore_message(message_id, user_id):
         
         cursor.execute("UPDATE messages SET deleted = 0 WHERE message_id = ?", (message_id,))
         conn.commit()
+        _invalidate_thread_caches(message['sender_id'], message['receiver_id'])
     
     return {'success': True, 'data': {'message_id': message_id}}
 
+# Shortest search served by users_fts (its trigram tokenizer needs 3 characters)
+_USER_SEARCH_MIN_FTS_LENGTH = 3
+
 def search_users_for_messaging(current_user_id, search=None, limit=50):
     """Search for users that can be messaged (excluding suspended and deleted users, and current user)."""
     conditions = ["(suspended = 0 OR suspended IS NULL)", "(deleted = 0 OR deleted IS NULL)", "user_id != ?"]
     values = [current_user_id]
     
-    if search:
+    if search and len(search) >= _USER_SEARCH_MIN_FTS_LENGTH:
+        # Substring match on name or email through the users_fts trigram index;
+        # the search is quoted as one phrase so FTS5 syntax in it is matched literally
+        conditions.append("user_id IN (SELECT rowid FROM users_fts WHERE users_fts MATCH ?)")
+        values.append('"' + search.replace('"', '""') + '"')
+    elif search:
+        # Too short for trigrams
         conditions.append("(name LIKE ? OR email LIKE ?)")
         search_pattern = f"%{search}%"
         values.extend([search_pattern, search_pattern])
@@ -602,42 +632,45 @@ def get_existing_thread_id(user1_id, user2_id, resource_id=None):
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        # The pair and resource guard against thread ID collisions between conversations
         cursor.execute("""
-            SELECT thread_id 
+            SELECT 1
             FROM messages
             WHERE thread_id = ?
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (sender_id = ? OR receiver_id = ?)
-            AND (resource_id = ? OR (? IS NULL AND resource_id IS NULL))
+            AND user_a_id = ? AND user_b_id = ?
+            AND resource_id IS ?
             AND deleted = 0
             LIMIT 1
-        """, (thread_id, user1_id, user1_id, user2_id, user2_id, resource_id, resource_id))
+        """, (thread_id, min(user1_id, user2_id), max(user1_id, user2_id), resource_id))
         
-        result = cursor.fetchone()
-        if result:
-            return result['thread_id']
+        if cursor.fetchone():
+            return thread_id
     
     return None
 
 def get_unread_count(user_id):
-    """Get total count of unread threads for a user (thread-level read status)."""
+    """Get total count of unread threads for a user (thread-level read status).
+    
+    Counts are cached briefly per user and dropped whenever messaging changes them.
+    """
+    key = (get_database_path(), user_id)
+    now = time.monotonic()
+    cached = _unread_count_cache.get(key)
+    if cached is not None and now - cached[0] < _UNREAD_COUNT_TTL_SECONDS:
+        return cached[1]
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
         # Count threads that are not marked as read (or don't exist in thread_read table)
         # A thread is unread if:
         # 1. No entry exists in thread_read (defaults to unread)
         # 2. Entry exists with is_read = 0
-        cursor.execute("""
-            SELECT COUNT(DISTINCT m.thread_id)
-            FROM messages m
-            LEFT JOIN thread_read tr ON m.thread_id = tr.thread_id AND tr.user_id = ?
-            WHERE (m.sender_id = ? OR m.receiver_id = ?)
-            AND (tr.is_read = 0 OR tr.is_read IS NULL)
-            AND m.deleted = 0
-        """, (user_id, user_id, user_id))
+        # Each of the user's thread_ids is checked once against the thread_read primary key
+        cursor.execute(_SQL_UNREAD_COUNT, (user_id, user_id, user_id))
         
         count = cursor.fetchone()[0]
     
+    _unread_count_cache[key] = (now, count)
     return count
 
 def mark_message_read(message_id, user_id):
@@ -682,27 +715,14 @@ def mark_thread_read(thread_id, user_id):
     """Mark a thread as read for the user (thread-level status)."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        # Check if thread exists and user has access
-        cursor.execute("""
-            SELECT 1 FROM messages
-            WHERE thread_id = ?
-            AND (sender_id = ? OR receiver_id = ?)
-            AND deleted = 0
-            LIMIT 1
-        """, (thread_id, user_id, user_id))
+        # Insert or update thread_read status if the thread exists and user has access
+        cursor.execute(_SQL_SET_THREAD_READ_FOR_PARTICIPANT,
+                       (user_id, thread_id, 1, thread_id, user_id, user_id))
         
-        if not cursor.fetchone():
+        if cursor.rowcount == 0:
             return {'success': False, 'error': 'Thread not found or access denied'}
-        
-        # Insert or update thread_read status
-        cursor.execute("""
-            INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
-            VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_id, thread_id) DO UPDATE SET
-                is_read = 1,
-                updated_at = CURRENT_TIMESTAMP
-        """, (user_id, thread_id))
         conn.commit()
+        _invalidate_thread_caches(user_id)
     
     return {'success': True, 'data': {'thread_id': thread_id}}
 
@@ -710,27 +730,14 @@ def mark_thread_unread(thread_id, user_id):
     """Mark a thread as unread for the user (thread-level status)."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        # Check if thread exists and user has access
-        cursor.execute("""
-            SELECT 1 FROM messages
-            WHERE thread_id = ?
-            AND (sender_id = ? OR receiver_id = ?)
-            AND deleted = 0
-            LIMIT 1
-        """, (thread_id, user_id, user_id))
+        # Insert or update thread_read status if the thread exists and user has access
+        cursor.execute(_SQL_SET_THREAD_READ_FOR_PARTICIPANT,
+                       (user_id, thread_id, 0, thread_id, user_id, user_id))
         
-        if not cursor.fetchone():
+        if cursor.rowcount == 0:
             return {'success': False, 'error': 'Thread not found or access denied'}
-        
-        # Insert or update thread_read status
-        cursor.execute("""
-            INSERT INTO thread_read (user_id, thread_id, is_read, updated_at)
-            VALUES (?, ?, 0, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_id, thread_id) DO UPDATE SET
-                is_read = 0,
-                updated_at = CURRENT_TIMESTAMP
-        """, (user_id, thread_id))
         conn.commit()
+        _invalidate_thread_caches(user_id)
     
     return {'success': True, 'data': {'thread_id': thread_id}}
 
@@ -3,11 +3,17 @@ Notification service for simulated email notifications.
 Logs notifications instead of actually sending emails (acceptable per requirements).
 """
 from src.utils.logging_config import get_logger
-from datetime import datetime
-from src.data_access.database import get_db_connection
 
 logger = get_logger(__name__)
 
+# Closing line of a status change notification, by new status
+_STATUS_MESSAGES = {
+    'approved': 'Your booking has been approved.',
+    'cancelled': 'Your booking has been cancelled.',
+    'completed': 'Your booking has been completed.',
+    'denied': 'Your booking request has been denied.'
+}
+
 def send_booking_confirmation(booking_id, requester_email, resource_title, start_datetime, end_datetime):
     """
     Send booking confirmation notification.
@@ -30,8 +36,7 @@ def send_booking_confirmation(booking_id, requester_email, resource_title, start
             f"Your booking has been confirmed. You can view your booking details in your account."
         )
         
-        logger.info(f"[NOTIFICATION] Booking Confirmation sent to {requester_email}")
-        logger.info(f"[NOTIFICATION] Message: {message}")
+        logger.info("[NOTIFICATION] Booking Confirmation sent to %s\n[NOTIFICATION] Message: %s", requester_email, message)
         
         return {'success': True, 'message': 'Booking confirmation notification sent'}
     except Exception as e:
@@ -51,13 +56,6 @@ def send_booking_status_change(booking_id, requester_email, resource_title, old_
         reason: Optional reason for status change
     """
     try:
-        status_messages = {
-            'approved': 'Your booking has been approved.',
-            'cancelled': 'Your booking has been cancelled.',
-            'completed': 'Your booking has been completed.',
-            'denied': 'Your booking request has been denied.'
-        }
-        
         message = (
             f"Booking Status Update\n"
             f"Booking ID: {booking_id}\n"
@@ -65,14 +63,13 @@ def send_booking_status_change(booking_id, requester_email, resource_title, old_
             f"Status Changed: {old_status} → {new_status}\n"
         )
         
-        if new_status in status_messages:
-            message += f"\n{status_messages[new_status]}"
+        if new_status in _STATUS_MESSAGES:
+            message += f"\n{_STATUS_MESSAGES[new_status]}"
         
         if reason:
             message += f"\nReason: {reason}"
         
-        logger.info(f"[NOTIFICATION] Booking Status Change sent to {requester_email}")
-        logger.info(f"[NOTIFICATION] Message: {message}")
+        logger.info("[NOTIFICATION] Booking Status Change sent to %s\n[NOTIFICATION] Message: %s", requester_email, message)
         
         return {'success': True, 'message': 'Booking status change notification sent'}
     except Exception as e:
@@ -102,8 +99,7 @@ def send_booking_approval(booking_id, requester_email, resource_title, approver_
             f"Your booking request has been approved. You can view your booking details in your account."
         )
         
-        logger.info(f"[NOTIFICATION] Booking Approval sent to {requester_email}")
-        logger.info(f"[NOTIFICATION] Message: {message}")
+        logger.info("[NOTIFICATION] Booking Approval sent to %s\n[NOTIFICATION] Message: %s", requester_email, message)
         
         return {'success': True, 'message': 'Booking approval notification sent'}
     except Exception as e:
@@ -131,8 +127,7 @@ def send_booking_rejection(booking_id, requester_email, resource_title, rejector
             f"Your booking request has been denied. Please contact the resource owner if you have questions."
         )
         
-        logger.info(f"[NOTIFICATION] Booking Rejection sent to {requester_email}")
-        logger.info(f"[NOTIFICATION] Message: {message}")
+        logger.info("[NOTIFICATION] Booking Rejection sent to %s\n[NOTIFICATION] Message: %s", requester_email, message)
         
         return {'success': True, 'message': 'Booking rejection notification sent'}
     except Exception as e:
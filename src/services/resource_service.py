@@ -1,7 +1,7 @@
 """
 Resource management service.
 """
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, bump_data_version
 from src.utils.json_utils import safe_json_dumps, parse_resource_json_fields
 from src.utils.html_utils import sanitize_html, unescape_description
 
@@ -112,6 +112,8 @@ def create_resource(owner_id, title, description, category, location, capacity=N
         
         resource_id = cursor.lastrowid
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'resource_id': resource_id}}
 
 def get_resource(resource_id):
@@ -238,6 +240,12 @@ def update_resource(resource_id, owner_id=None, **kwargs):
             WHERE resource_id = ?
         """, values)
     
+    # Booking validation caches operating hours per resource
+    from src.services.booking_service import invalidate_operating_hours
+    invalidate_operating_hours(resource_id)
+    
+    bump_data_version()
+    
     return {'success': True, 'data': {'resource_id': resource_id}}
 
 def delete_resource(resource_id):
@@ -416,6 +424,8 @@ def reassign_resource_ownership(resource_id, new_owner_id, admin_id):
         
         conn.commit()
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'resource_id': resource_id, 'new_owner_id': new_owner_id}}
 
 def get_featured_resources(limit=6):
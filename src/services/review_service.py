@@ -3,7 +3,7 @@ Review and rating service.
 """
 from datetime import datetime, timedelta
 from dateutil.tz import tzutc
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, bump_data_version
 
 def create_review(resource_id, reviewer_id, rating, comment=None, booking_id=None):
     """Create a review for a resource.
@@ -105,6 +105,8 @@ def create_review(resource_id, reviewer_id, rating, comment=None, booking_id=Non
         
         review_id = cursor.lastrowid
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'review_id': review_id}}
 
 def update_review(review_id, reviewer_id, rating=None, comment=None):
@@ -157,6 +159,8 @@ def update_review(review_id, reviewer_id, rating=None, comment=None):
             WHERE review_id = ?
         """, values)
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'review_id': review_id}}
 
 def delete_review(review_id, user_id, is_admin=False):
@@ -174,8 +178,34 @@ def delete_review(review_id, user_id, is_admin=False):
         
         cursor.execute("DELETE FROM reviews WHERE review_id = ?", (review_id,))
     
+    bump_data_version()
+    
     return {'success': True, 'data': {'review_id': review_id}}
 
+def get_average_ratings(resource_ids):
+    """Get average ratings for several resources in one query.
+    
+    Resources without reviews are omitted from the returned mapping.
+    """
+    resource_ids = list(dict.fromkeys(resource_ids))
+    if not resource_ids:
+        return {'success': True, 'data': {'ratings': {}}}
+    
+    placeholders = ','.join('?' * len(resource_ids))
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT resource_id, AVG(rating) as avg_rating
+            FROM reviews
+            WHERE resource_id IN ({placeholders})
+            GROUP BY resource_id
+        """, resource_ids)
+        
+        ratings = {row['resource_id']: float(row['avg_rating'])
+                   for row in cursor.fetchall() if row['avg_rating']}
+    
+    return {'success': True, 'data': {'ratings': ratings}}
+
 def get_resource_reviews(resource_id, limit=20, offset=0):
     """Get reviews for a resource."""
     with get_db_connection() as conn:
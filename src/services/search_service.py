@@ -10,8 +10,9 @@ from dateutil import parser
 def search_resources(keyword=None, category=None, location=None, capacity_min=None,
                     capacity_max=None, available_from=None, available_to=None,
                     available_date=None, available_start_time=None, available_end_time=None,
-                    restricted=None, sort_by='created_at', sort_order='desc', page=1, page_size=20):
-    """Search resources with filters and sorting."""
+                    restricted=None, sort_by='created_at', sort_order='desc', page=1, page_size=20,
+                    exclude_ids=None):
+    """Search resources with filters and sorting. Resources in exclude_ids are left out."""
     # Validate pagination
     page = max(1, int(page))
     page_size = min(100, max(1, int(page_size)))
@@ -51,6 +52,11 @@ def search_resources(keyword=None, category=None, location=None, capacity_min=No
         conditions.append("r.restricted = ?")
         values.append(1 if restricted else 0)
     
+    # Excluded resources (e.g., the resource related results are shown for)
+    if exclude_ids:
+        conditions.append(f"r.resource_id NOT IN ({','.join('?' * len(exclude_ids))})")
+        values.extend(exclude_ids)
+    
     # Availability filter - check date and time range
     availability_filter_applied = False
     if available_date and available_start_time and available_end_time:
@@ -1,13 +1,17 @@
 """
 Datetime utility functions.
 """
-from datetime import datetime
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from dateutil import parser
-from dateutil.tz import gettz, tzutc
 from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# ZoneInfo caches instances by key, so this is the same object other modules get
+_EST_TZ = ZoneInfo('America/New_York')
+_UTC = timezone.utc
+
 
 def parse_datetime_aware(dt_str):
     """
@@ -20,16 +24,21 @@ def parse_datetime_aware(dt_str):
         timezone-aware datetime object in UTC
     """
     try:
-        dt = parser.parse(dt_str.replace('Z', '+00:00'))
+        dt_str = dt_str.replace('Z', '+00:00')
+        try:
+            # Stored booking times are ISO 8601, which the C parser handles directly
+            dt = datetime.fromisoformat(dt_str)
+        except ValueError:
+            dt = parser.parse(dt_str)
         if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tzutc())
+            dt = dt.replace(tzinfo=_UTC)
         else:
-            dt = dt.astimezone(tzutc())
+            dt = dt.astimezone(_UTC)
         return dt
     except (ValueError, TypeError) as e:
         logger.warning(f"Failed to parse datetime string '{dt_str}': {e}")
         # Return a very old datetime as fallback for sorting
-        return datetime(1970, 1, 1, tzinfo=tzutc())
+        return datetime(1970, 1, 1, tzinfo=_UTC)
 
 
 def ensure_utc(dt):
@@ -43,8 +52,8 @@ def ensure_utc(dt):
         timezone-aware datetime in UTC
     """
     if dt.tzinfo is None:
-        return dt.replace(tzinfo=tzutc())
-    return dt.astimezone(tzutc())
+        return dt.replace(tzinfo=_UTC)
+    return dt.astimezone(_UTC)
 
 
 def convert_to_est(dt):
@@ -57,10 +66,12 @@ def convert_to_est(dt):
     Returns:
         datetime object in EST/EDT
     """
+    if dt.tzinfo is _EST_TZ:
+        # Already Eastern; astimezone() would only copy it
+        return dt
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=tzutc())
-    est_tz = gettz('America/New_York')
-    return dt.astimezone(est_tz)
+        dt = dt.replace(tzinfo=_UTC)
+    return dt.astimezone(_EST_TZ)
 
 
 def format_datetime_est(value, format_type='full'):
@@ -88,11 +99,10 @@ def format_datetime_est(value, format_type='full'):
         
         # If datetime is naive, assume UTC
         if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tzutc())
+            dt = dt.replace(tzinfo=_UTC)
         
         # Convert to EST/EDT (America/New_York handles DST automatically)
-        est_tz = gettz('America/New_York')
-        dt_est = dt.astimezone(est_tz)
+        dt_est = dt.astimezone(_EST_TZ)
         
         # Determine timezone abbreviation (EDT or EST)
         is_dst = bool(dt_est.dst() and dt_est.dst().total_seconds() != 0)
@@ -137,11 +147,10 @@ def format_datetime_local(value):
         
         # If datetime is naive, assume UTC
         if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tzutc())
+            dt = dt.replace(tzinfo=_UTC)
         
         # Convert to local timezone (EST/EDT)
-        est_tz = gettz('America/New_York')
-        dt_local = dt.astimezone(est_tz)
+        dt_local = dt.astimezone(_EST_TZ)
         
         # Format as YYYY-MM-DDTHH:mm for datetime-local input
         return dt_local.strftime('%Y-%m-%dT%H:%M')
@@ -1,11 +1,27 @@
 """
 Logging configuration for the Campus Resource Hub application.
 """
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from src.utils.config import Config
 
+# Writes queued log records to the configured handlers on a background thread
+_queue_listener = None
+
+
+def _stop_queue_listener():
+    """Flush queued records and stop the listener thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
 
 def setup_logging(log_level: str = None):
     """
@@ -33,6 +49,7 @@ def setup_logging(log_level: str = None):
     
     # Remove existing handlers to avoid duplicates
     root_logger.handlers.clear()
+    _stop_queue_listener()
     
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -49,7 +66,6 @@ def setup_logging(log_level: str = None):
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
     
     # File handler (rotating)
     file_handler = RotatingFileHandler(
@@ -59,7 +75,6 @@ def setup_logging(log_level: str = None):
     )
     file_handler.setLevel(logging.DEBUG)  # Always log DEBUG to file
     file_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(file_handler)
     
     # Error file handler (only errors and above)
     error_handler = RotatingFileHandler(
@@ -69,7 +84,15 @@ def setup_logging(log_level: str = None):
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(error_handler)
+    
+    # Logging calls only enqueue records; formatting and file/console writes happen
+    # on the listener thread, off the request path
+    global _queue_listener
+    log_queue = queue.SimpleQueue()
+    _queue_listener = QueueListener(log_queue, console_handler, file_handler, error_handler,
+                                    respect_handler_level=True)
+    _queue_listener.start()
+    root_logger.addHandler(QueueHandler(log_queue))
     
     # Suppress noisy third-party loggers
     logging.getLogger('werkzeug').setLevel(logging.WARNING)
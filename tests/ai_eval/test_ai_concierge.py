@@ -35,3 +35,12 @@ def test_ai_concierge_parsing():
         # At least one resource should match the query
         assert len(result['data'].get('resources', [])) >= 0  # May be empty if no matches
 
+
+def test_detect_intents_overlapping_keywords():
+    """Test that a query can carry several intents at once."""
+    from src.services.ai_concierge import detect_intents
+    
+    intents = detect_intents("tell me about the best study rooms in the library")
+    assert {'lookup', 'top_rated', 'category', 'location'} <= intents
+    assert 'help' not in intents
+    assert detect_intents("") == set()
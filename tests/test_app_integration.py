@@ -3,7 +3,7 @@ Integration tests for Flask application.
 """
 import pytest
 from app import app
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
 import os
 import tempfile
 
@@ -41,6 +41,7 @@ def client():
     
     # Cleanup
     os.close(db_fd)
+    close_all_connections()
     if os.path.exists(db_path):
         os.unlink(db_path)
     if original_db_path:
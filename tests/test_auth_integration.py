@@ -4,7 +4,8 @@ Tests complete flow: register → login → access protected route.
 """
 import pytest
 from app import app
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
+from src.services.booking_service import _flush_notifications
 import os
 import tempfile
 
@@ -48,7 +49,9 @@ def client():
         yield client
     
     # Cleanup - ensure database is deleted
+    _flush_notifications()
     os.close(db_fd)
+    close_all_connections()
     if os.path.exists(db_path):
         try:
             os.unlink(db_path)
@@ -0,0 +1,64 @@
+"""
+Unit tests for the authentication service.
+Tests input validation and registration against the database.
+"""
+import pytest
+import os
+from src.data_access.database import close_all_connections
+from src.services.auth_service import validate_name
+
+
+def test_validate_name_accepts_letters_spaces_hyphens_apostrophes():
+    """Test that ordinary names, including Unicode whitespace, are accepted."""
+    assert validate_name("Mary-Jane O'Neil")[0] is True
+    assert validate_name("Ana\u00a0Lopez")[0] is True
+    assert validate_name("Ana\tLopez")[0] is True
+
+
+def test_validate_name_rejects_other_characters():
+    """Test that digits and symbols are rejected."""
+    assert validate_name("R2D2")[0] is False
+    assert validate_name("Bob <script>")[0] is False
+    assert validate_name("A")[0] is False
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database with the full schema."""
+    import tempfile
+    import uuid
+    from init_db import init_database
+    test_db_path = os.path.join(tempfile.gettempdir(), f'test_{uuid.uuid4().hex}.db')
+    os.environ['DATABASE_PATH'] = test_db_path
+    init_database()
+
+    yield test_db_path
+
+    os.environ.pop('DATABASE_PATH', None)
+    close_all_connections()
+    if os.path.exists(test_db_path):
+        os.unlink(test_db_path)
+
+
+def test_register_user_rejects_duplicate_email(test_db):
+    """Test that an email already used by an active account cannot register again."""
+    from src.services.auth_service import register_user
+    assert register_user('Alice Smith', 'alice@example.com', 'Password1!')['success']
+
+    result = register_user('Alice Jones', 'ALICE@example.com', 'Password1!')
+    assert result == {'success': False, 'error': 'Email already registered'}
+
+
+def test_register_user_after_soft_delete(test_db):
+    """Test that the email of a deleted account can be registered again."""
+    from src.services.auth_service import register_user
+    from src.services.admin_service import delete_user
+    from src.data_access.database import get_db_connection
+    first = register_user('Alice Smith', 'alice@example.com', 'Password1!')['data']['user_id']
+    with get_db_connection() as conn:
+        admin_id = conn.execute("SELECT user_id FROM users WHERE role = 'admin'").fetchone()['user_id']
+    assert delete_user(first, admin_id)['success']
+
+    result = register_user('Alice Smith', 'alice@example.com', 'Password1!')
+    assert result['success']
+    assert result['data']['user_id'] != first
@@ -4,7 +4,8 @@ Demonstrates complete booking process through the UI.
 """
 import pytest
 from app import app
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
+from src.services.booking_service import _flush_notifications
 from src.utils.config import Config
 import os
 import tempfile
@@ -98,7 +99,9 @@ def client():
         yield client, resource_id, student_id
     
     # Cleanup - ensure database is deleted
+    _flush_notifications()
     os.close(db_fd)
+    close_all_connections()
     if os.path.exists(db_path):
         try:
             os.unlink(db_path)
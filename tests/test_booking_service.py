@@ -9,9 +9,10 @@ from src.services.booking_service import (
     check_conflicts,
     validate_booking_datetime,
     create_booking,
-    update_booking_status
+    update_booking_status,
+    _flush_notifications
 )
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
 from src.utils.config import Config
 import os
 
@@ -90,7 +91,9 @@ def test_db():
     yield test_db_path
     
     # Cleanup
+    _flush_notifications()
     os.environ.pop('DATABASE_PATH', None)
+    close_all_connections()
     if os.path.exists(test_db_path):
         os.unlink(test_db_path)
 
@@ -469,6 +472,13 @@ def test_create_booking_with_conflict(test_db):
     
     assert result2['success'] == False
     assert 'conflict' in result2['error'].lower() or 'unavailable' in result2['error'].lower()
+    assert [c['booking_id'] for c in result2['conflicts']] == [result1['data']['booking_id']]
+    
+    # The conflicting booking was not inserted
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM bookings")
+        assert cursor.fetchone()[0] == 1
 
 
 def test_booking_status_transition_approve(test_db):
@@ -626,6 +636,30 @@ def test_booking_status_transition_cancel(test_db):
         assert status == 'cancelled'
 
 
+def test_status_change_notification_uses_booking_database(test_db, monkeypatch):
+    """Test that status change notifications carry the requester email and resource title."""
+    from src.services import notification_service
+    sent = []
+    monkeypatch.setattr(notification_service, 'send_booking_status_change', lambda **kwargs: sent.append(kwargs))
+    
+    now = datetime.now(tzutc())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (1, 1, ?, ?, 'approved')
+        """, ((now + timedelta(days=1)).isoformat(), (now + timedelta(days=1, hours=1)).isoformat()))
+        booking_id = cursor.lastrowid
+    
+    assert update_booking_status(booking_id, 'cancelled')['success'] is True
+    _flush_notifications()
+    
+    assert len(sent) == 1
+    assert sent[0]['requester_email'] == 'test@example.com'
+    assert sent[0]['resource_title'] == 'Test Resource'
+    assert (sent[0]['old_status'], sent[0]['new_status']) == ('approved', 'cancelled')
+
+
 def test_booking_status_transition_invalid(test_db):
     """Test that invalid status transitions are rejected."""
     from dateutil.tz import gettz
@@ -672,3 +706,279 @@ def test_booking_status_transition_invalid(test_db):
     # This test verifies the function works, but note that business logic validation should happen elsewhere
     assert result['success'] == True
 
+
+
+def test_list_bookings_filters(test_db):
+    """Test that list_bookings applies each filter combination and counts totals."""
+    now = datetime.now(tzutc())
+    rows = [
+        (1, 1, now + timedelta(days=1), 'approved'),
+        (1, 2, now + timedelta(days=2), 'approved'),
+        (1, 1, now + timedelta(days=3), 'cancelled'),
+    ]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for resource_id, requester_id, start, status in rows:
+            cursor.execute("""
+                INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, (resource_id, requester_id, start.isoformat(), (start + timedelta(hours=1)).isoformat(), status))
+        conn.commit()
+    
+    from src.services.booking_service import list_bookings
+    assert list_bookings()['data']['total'] == 3
+    assert list_bookings(user_id=1)['data']['total'] == 2
+    assert list_bookings(status='approved')['data']['total'] == 2
+    
+    result = list_bookings(user_id=1, resource_id=1, status='cancelled')
+    assert result['data']['total'] == 1
+    assert result['data']['bookings'][0]['status'] == 'cancelled'
+    
+    # Pagination limits rows but not the total; newest start first
+    result = list_bookings(resource_id=1, limit=1, offset=0)
+    assert result['data']['total'] == 3
+    assert len(result['data']['bookings']) == 1
+    assert result['data']['bookings'][0]['status'] == 'cancelled'
+    assert 'total' not in result['data']['bookings'][0]
+    
+    # A page past the end still reports the total
+    result = list_bookings(resource_id=1, limit=2, offset=4)
+    assert result['data'] == {'bookings': [], 'total': 3}
+    assert list_bookings(resource_id=2)['data'] == {'bookings': [], 'total': 0}
+
+
+def test_mark_completed_bookings(test_db):
+    """Test that only approved bookings that have ended are marked completed."""
+    now = datetime.now(tzutc())
+    rows = [
+        (now - timedelta(hours=3), now - timedelta(hours=2), 'approved'),
+        (now - timedelta(hours=3), now - timedelta(hours=2), 'cancelled'),
+        (now + timedelta(hours=2), now + timedelta(hours=3), 'approved'),
+    ]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for start, end, status in rows:
+            cursor.execute("""
+                INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, (1, 1, start.isoformat(), end.isoformat(), status))
+        conn.commit()
+    
+    from src.services.booking_service import mark_completed_bookings
+    result = mark_completed_bookings()
+    assert result['success'] is True
+    assert result['data']['count'] == 1
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status FROM bookings ORDER BY booking_id")
+        assert [row['status'] for row in cursor.fetchall()] == ['completed', 'cancelled', 'approved']
+    
+    # Nothing left to complete on a second pass
+    assert mark_completed_bookings()['data']['count'] == 0
+
+
+def test_booking_writes_bump_data_version(test_db):
+    """Test that booking writes change the data version cached concierge responses are keyed on."""
+    from src.data_access.database import get_data_version
+    from src.services import ai_concierge
+    from src.services.booking_service import mark_completed_bookings, update_booking
+    
+    now = datetime.now(tzutc())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (1, 1, ?, ?, 'approved')
+        """, ((now - timedelta(hours=3)).isoformat(), (now - timedelta(hours=2)).isoformat()))
+        booking_id = cursor.lastrowid
+    
+    key = ai_concierge._response_cache_key("how many bookings")
+    ai_concierge._store_cached_response(key, {'success': True, 'data': {}})
+    assert ai_concierge._get_cached_response(key) is not None
+    
+    version = get_data_version()
+    assert mark_completed_bookings()['data']['count'] == 1
+    assert get_data_version() > version
+    assert ai_concierge._get_cached_response(ai_concierge._response_cache_key("how many bookings")) is None
+    
+    version = get_data_version()
+    assert update_booking(booking_id, status='cancelled', skip_validation=True)['success'] is True
+    assert get_data_version() > version
+
+
+def test_list_bookings_throttles_completion_sweep(test_db):
+    """Test that read paths sweep ended bookings at most once per interval."""
+    from src.services.booking_service import list_bookings, mark_completed_bookings
+    now = datetime.now(tzutc())
+    
+    def insert_ended_booking():
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, (1, 1, (now - timedelta(hours=3)).isoformat(), (now - timedelta(hours=2)).isoformat(), 'approved'))
+            return cursor.lastrowid
+    
+    first_id = insert_ended_booking()
+    assert list_bookings()['data']['bookings'][0]['status'] == 'completed'
+    
+    # A second read within the interval does not sweep again
+    second_id = insert_ended_booking()
+    statuses = {b['booking_id']: b['status'] for b in list_bookings()['data']['bookings']}
+    assert statuses == {first_id: 'completed', second_id: 'approved'}
+    
+    # An explicit sweep is never throttled
+    assert mark_completed_bookings()['data']['count'] == 1
+
+
+def test_has_conflict(test_db):
+    """Test that has_conflict agrees with check_conflicts."""
+    from src.services.booking_service import has_conflict
+    now = datetime.now(tzutc())
+    start = now + timedelta(hours=2)
+    end = now + timedelta(hours=4)
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (1, 1, start.isoformat(), end.isoformat(), 'approved'))
+        booking_id = cursor.lastrowid
+        conn.commit()
+    
+    assert has_conflict(1, start + timedelta(hours=1), end + timedelta(hours=1)) is True
+    assert has_conflict(1, end, end + timedelta(hours=1)) is False
+    assert has_conflict(2, start, end) is False
+    assert has_conflict(1, start, end, exclude_booking_id=booking_id) is False
+
+
+def test_local_wall_time_matches_astimezone_across_dst():
+    """Test that cached offset arithmetic agrees with astimezone around DST changes."""
+    from src.services.booking_service import _local_wall_time
+    tz = gettz('America/New_York')
+    for day in (datetime(2024, 3, 10, 4, tzinfo=tzutc()), datetime(2024, 11, 3, 4, tzinfo=tzutc())):
+        for minutes in range(0, 6 * 60, 7):
+            dt = day + timedelta(minutes=minutes)
+            assert _local_wall_time(dt, 'America/New_York') == dt.astimezone(tz).replace(tzinfo=None)
+
+
+def test_operating_hours_cache_invalidation(test_db):
+    """Test that cached operating hours are reused until invalidated."""
+    from src.services.booking_service import get_operating_hours, invalidate_operating_hours
+    expected = (Config.BOOKING_OPERATING_HOURS_START, Config.BOOKING_OPERATING_HOURS_END, False)
+    assert get_operating_hours(1) == expected
+    assert get_operating_hours(999) is None
+    
+    with get_db_connection() as conn:
+        conn.execute("UPDATE resources SET is_24_hours = 1 WHERE resource_id = 1")
+    
+    # Still served from the cache
+    assert get_operating_hours(1) == expected
+    
+    invalidate_operating_hours(1)
+    assert get_operating_hours(1)[2] is True
+
+
+def test_validate_booking_datetime_operating_hours_minutes(test_db):
+    """Test that starts within the opening hour are allowed and ends past closing are not."""
+    tz = gettz(Config.TIMEZONE)
+    day = (datetime.now(tz) + timedelta(days=2)).replace(second=0, microsecond=0)
+    opening = day.replace(hour=Config.BOOKING_OPERATING_HOURS_START, minute=30)
+    closing = day.replace(hour=Config.BOOKING_OPERATING_HOURS_END, minute=0)
+    
+    valid, _, _, error = validate_booking_datetime(opening, opening + timedelta(hours=1), resource_id=1)
+    assert valid, error
+    
+    valid, _, _, error = validate_booking_datetime(closing - timedelta(minutes=30), closing + timedelta(minutes=15), resource_id=1)
+    assert not valid
+    assert f"{Config.BOOKING_OPERATING_HOURS_END:02d}:00" in error
+
+
+def test_update_booking_status_skips_completion_sweep(test_db):
+    """Test that status updates read the old row without sweeping other bookings."""
+    now = datetime.now(tzutc())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (1, 1, (now - timedelta(hours=3)).isoformat(), (now - timedelta(hours=2)).isoformat(), 'approved'))
+        ended_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (1, 1, (now + timedelta(days=1)).isoformat(), (now + timedelta(days=1, hours=1)).isoformat(), 'approved'))
+        upcoming_id = cursor.lastrowid
+        conn.commit()
+    
+    assert update_booking_status(upcoming_id, 'cancelled')['success']
+    assert update_booking_status(999, 'cancelled') == {'success': False, 'error': 'Booking not found'}
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT booking_id, status FROM bookings")
+        statuses = {row['booking_id']: row['status'] for row in cursor.fetchall()}
+    assert statuses == {ended_id: 'approved', upcoming_id: 'cancelled'}
+
+
+def test_create_booking_conflict_after_precheck(test_db, monkeypatch):
+    """Test that the conditional INSERT still rejects a slot taken after the read-only pre-check."""
+    import src.services.booking_service as booking_service
+    tz = gettz(Config.TIMEZONE)
+    start = (datetime.now(tz) + timedelta(days=2)).replace(
+        hour=Config.BOOKING_OPERATING_HOURS_START + 1, minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=1)
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (1, 2, start.astimezone(tzutc()).isoformat(), end.astimezone(tzutc()).isoformat(), 'approved'))
+        existing_id = cursor.lastrowid
+        conn.commit()
+    
+    # Simulate the other booking landing between the pre-check and the INSERT
+    real_select_conflicts = booking_service._select_conflicts
+    calls = []
+    def racing_select_conflicts(*args, **kwargs):
+        calls.append(args)
+        return [] if len(calls) == 1 else real_select_conflicts(*args, **kwargs)
+    monkeypatch.setattr(booking_service, '_select_conflicts', racing_select_conflicts)
+    
+    result = booking_service.create_booking(resource_id=1, requester_id=1, start_datetime=start, end_datetime=end)
+    assert result['success'] == False
+    assert [c['booking_id'] for c in result['conflicts']] == [existing_id]
+    assert len(calls) == 2
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM bookings")
+        assert cursor.fetchone()[0] == 1
+
+
+def test_bookings_stored_and_compared_in_utc(test_db):
+    """Test that offset datetimes are stored as UTC and conflict checks compare instants."""
+    from src.services.booking_service import has_conflict
+    tz = gettz(Config.TIMEZONE)
+    start = (datetime.now(tz) + timedelta(days=2)).replace(
+        hour=Config.BOOKING_OPERATING_HOURS_START + 1, minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=1)
+    
+    result = create_booking(resource_id=1, requester_id=1, start_datetime=start, end_datetime=end)
+    assert result['success'], result.get('error')
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT start_datetime, end_datetime FROM bookings WHERE booking_id = ?",
+                       (result['data']['booking_id'],))
+        row = cursor.fetchone()
+    assert row['start_datetime'] == start.astimezone(tzutc()).isoformat()
+    assert row['end_datetime'] == end.astimezone(tzutc()).isoformat()
+    
+    # The same instants expressed with a local offset still conflict
+    assert has_conflict(1, start + timedelta(minutes=30), end + timedelta(minutes=30))
+    assert not has_conflict(1, end, end + timedelta(hours=1))
@@ -0,0 +1,302 @@
+"""
+Unit tests for calendar view preparation.
+Tests day-view slot availability, month-view booking counts and operating hours.
+"""
+import pytest
+import os
+from datetime import datetime, timedelta, date
+from dateutil.tz import gettz, tzutc
+from src.services.booking_service import _flush_notifications
+from src.services.calendar_service import prepare_calendar_data
+from src.data_access.database import get_db_connection, close_all_connections
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database with one regular and one 24-hour resource."""
+    import tempfile
+    import uuid
+    test_db_path = os.path.join(tempfile.gettempdir(), f'test_{uuid.uuid4().hex}.db')
+    os.environ['DATABASE_PATH'] = test_db_path
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS resources (
+                resource_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                operating_hours_start INTEGER NOT NULL DEFAULT 8,
+                operating_hours_end INTEGER NOT NULL DEFAULT 22,
+                is_24_hours BOOLEAN DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bookings (
+                booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                resource_id INTEGER,
+                requester_id INTEGER,
+                start_datetime DATETIME NOT NULL,
+                end_datetime DATETIME NOT NULL,
+                status TEXT DEFAULT 'approved',
+                rejection_reason TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("INSERT INTO resources (title, operating_hours_start, operating_hours_end, is_24_hours) VALUES (?, ?, ?, ?)",
+                      ('Study Room', 9, 17, 0))
+        cursor.execute("INSERT INTO resources (title, operating_hours_start, operating_hours_end, is_24_hours) VALUES (?, ?, ?, ?)",
+                      ('Open Lab', 8, 22, 1))
+        conn.commit()
+
+    yield test_db_path
+
+    _flush_notifications()
+    os.environ.pop('DATABASE_PATH', None)
+    close_all_connections()
+    if os.path.exists(test_db_path):
+        os.unlink(test_db_path)
+
+
+@pytest.fixture
+def future_day():
+    """A day far enough ahead that no slot is blocked by the advance-booking rule."""
+    return date.today() + timedelta(days=40)
+
+
+def make_booking(booking_id, day, start_hour, start_minute, end_hour, end_minute):
+    """Build a raw booking row with UTC ISO times from Eastern wall-clock times."""
+    est = gettz('America/New_York')
+    start = datetime(day.year, day.month, day.day, start_hour, start_minute, tzinfo=est)
+    end = datetime(day.year, day.month, day.day, end_hour, end_minute, tzinfo=est)
+    return {
+        'booking_id': booking_id,
+        'start_datetime': start.astimezone(tzutc()).isoformat(),
+        'end_datetime': end.astimezone(tzutc()).isoformat(),
+        'status': 'approved'
+    }
+
+
+def slot_availability(day_data):
+    """Map 'HH:MM' slot start times to availability."""
+    return {slot['start_time']: slot['is_available'] for slot in day_data['time_slots']}
+
+
+def test_day_view_slots(test_db, future_day):
+    """Test that day-view slots respect bookings and operating hours."""
+    bookings = [make_booking(1, future_day, 10, 0, 11, 30)]
+    result = prepare_calendar_data(1, bookings, future_day.year, future_day.month, future_day.day)
+
+    day_data = result['day_data']
+    assert result['calendar_data'] is None
+    assert len(day_data['time_slots']) == 48
+    assert [b['booking_id'] for b in day_data['bookings']] == [1]
+    assert day_data['booked_slots'] == [
+        {'start_minutes': 600, 'end_minutes': 690, 'start_time': '10:00', 'end_time': '11:30'}
+    ]
+
+    availability = slot_availability(day_data)
+    assert availability['08:30'] is False  # before opening
+    assert availability['09:00'] is True
+    assert availability['09:30'] is True
+    assert availability['10:00'] is False  # booked
+    assert availability['11:00'] is False  # booked
+    assert availability['11:30'] is True
+    assert availability['16:30'] is True
+    assert availability['17:00'] is False  # at closing
+    assert day_data['time_slots'][-1]['end_time'] == '23:59'
+
+
+def test_day_view_24_hour_resource(test_db, future_day):
+    """Test that a 24-hour resource has every unbooked slot available."""
+    result = prepare_calendar_data(2, [], future_day.year, future_day.month, future_day.day)
+    assert all(slot_availability(result['day_data']).values())
+
+
+def test_month_view_counts_bookings_per_day(test_db, future_day):
+    """Test that the month grid counts bookings per day and drops other months."""
+    other_month = future_day + timedelta(days=40)
+    bookings = [
+        make_booking(1, future_day, 9, 0, 10, 0),
+        make_booking(2, future_day, 13, 0, 14, 0),
+        make_booking(3, other_month, 9, 0, 10, 0),
+    ]
+    result = prepare_calendar_data(1, bookings, future_day.year, future_day.month)
+
+    assert result['day_data'] is None
+    days = {cell['day']: cell for week in result['calendar_data'] for cell in week if cell}
+    assert days[future_day.day]['bookings_count'] == 2
+    assert days[future_day.day]['has_bookings'] is True
+    assert sum(cell['bookings_count'] for cell in days.values()) == 2
+    assert [b['booking_id'] for b in result['approved_bookings']] == [1, 2]
+    assert 'start_time' not in result['approved_bookings'][0]
+    assert result['booked_slots'] == {}
+
+
+def test_day_view_only_lists_bookings_starting_that_day(test_db, future_day):
+    """Test that a booking carried over from the previous day is not listed on the day."""
+    overnight = make_booking(1, future_day - timedelta(days=1), 23, 0, 23, 30)
+    overnight['end_datetime'] = make_booking(1, future_day, 1, 0, 1, 0)['end_datetime']
+    bookings = [overnight, make_booking(2, future_day, 10, 0, 11, 0)]
+    result = prepare_calendar_data(1, bookings, future_day.year, future_day.month, future_day.day)
+
+    assert [b['booking_id'] for b in result['approved_bookings']] == [2]
+    assert list(result['booked_slots']) == [future_day.isoformat()]
+
+
+def test_operating_hours_cached_until_invalidated(test_db, future_day):
+    """Test that calendar renders reuse cached operating hours until the resource is updated."""
+    from src.services.booking_service import invalidate_operating_hours
+
+    def available(slot):
+        result = prepare_calendar_data(1, [], future_day.year, future_day.month, future_day.day)
+        return slot_availability(result['day_data'])[slot]
+
+    assert available('18:00') is False
+    with get_db_connection() as conn:
+        conn.execute("UPDATE resources SET operating_hours_end = 20 WHERE resource_id = 1")
+    assert available('18:00') is False
+
+    invalidate_operating_hours(1)
+    assert available('18:00') is True
+
+
+def test_navigation_bounds(test_db):
+    """Test month navigation around year boundaries and the current month."""
+    today = date.today()
+    result = prepare_calendar_data(1, [], today.year + 1, 1)
+    assert (result['prev_year'], result['prev_month']) == (today.year, 12)
+    assert (result['next_year'], result['next_month']) == (today.year + 1, 2)
+    assert result['can_go_prev'] is True
+
+    result = prepare_calendar_data(1, [], today.year - 1, 12)
+    assert result['can_go_prev'] is False
+
+
+def test_day_view_overlapping_bookings(test_db, future_day):
+    """Test slot conflicts with nested, overlapping and back-to-back bookings."""
+    bookings = [
+        make_booking(3, future_day, 14, 0, 14, 30),
+        make_booking(1, future_day, 9, 0, 13, 0),
+        make_booking(2, future_day, 10, 0, 10, 45),
+        make_booking(4, future_day, 14, 30, 15, 15),
+    ]
+    result = prepare_calendar_data(1, bookings, future_day.year, future_day.month, future_day.day)
+    availability = slot_availability(result['day_data'])
+
+    unavailable = {slot for slot, is_available in availability.items()
+                   if is_available is False and '09:00' <= slot < '17:00'}
+    assert unavailable == {'09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00', '12:30',
+                           '14:00', '14:30', '15:00'}
+
+
+def test_day_view_min_advance_cutoff(test_db):
+    """Test that today's slots before the advance-booking cutoff are unavailable."""
+    from src.utils.config import Config
+    advance = timedelta(hours=Config.BOOKING_MIN_ADVANCE_HOURS)
+    today = date.today()
+    before = datetime.now() + advance
+    result = prepare_calendar_data(2, [], today.year, today.month, today.day)
+    after = datetime.now() + advance
+
+    for slot in result['day_data']['time_slots']:
+        slot_dt = datetime.combine(today, datetime.min.time()) + timedelta(minutes=slot['time_minutes'])
+        if slot_dt < before:
+            assert slot['is_available'] is False
+        elif slot_dt >= after:
+            assert slot['is_available'] is True
+
+
+def test_month_view_keeps_late_evening_booking_on_last_day(test_db, future_day):
+    """Test that a booking whose UTC date falls in the next month is still shown."""
+    from calendar import monthrange
+    last_day = future_day.replace(day=monthrange(future_day.year, future_day.month)[1])
+    booking = make_booking(1, last_day, 21, 0, 22, 0)
+    assert booking['start_datetime'][:10] > last_day.isoformat()
+
+    result = prepare_calendar_data(1, [booking], future_day.year, future_day.month)
+    days = {cell['day']: cell for week in result['calendar_data'] for cell in week if cell}
+    assert days[last_day.day]['bookings_count'] == 1
+
+
+def test_fetches_only_bookings_in_range(test_db, future_day):
+    """Test that passing no bookings fetches the displayed range's approved bookings from the database."""
+    rows = [
+        make_booking(1, future_day, 10, 0, 11, 0),
+        make_booking(2, future_day + timedelta(days=1), 10, 0, 11, 0),
+        make_booking(3, future_day, 13, 0, 14, 0),
+    ]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for row, resource_id, status in zip(rows, (1, 1, 1), ('approved', 'approved', 'cancelled')):
+            cursor.execute("""
+                INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, (resource_id, 1, row['start_datetime'], row['end_datetime'], status))
+        conn.commit()
+
+    result = prepare_calendar_data(1, None, future_day.year, future_day.month, future_day.day)
+    assert [b['booking_id'] for b in result['approved_bookings']] == [1]
+    assert [b['booking_id'] for b in prepare_calendar_data(2, None, future_day.year, future_day.month,
+                                                           future_day.day)['approved_bookings']] == []
+
+
+def test_calendar_cached_until_bookings_change(test_db, future_day):
+    """Test that database-backed calendars are reused until the resource's bookings change."""
+    from src.services.booking_service import update_booking_status
+    booking = make_booking(1, future_day, 10, 0, 11, 0)
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO bookings (resource_id, requester_id, start_datetime, end_datetime, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (1, 1, booking['start_datetime'], booking['end_datetime'], 'approved'))
+
+    def booked_ids():
+        result = prepare_calendar_data(1, None, future_day.year, future_day.month, future_day.day)
+        return [b['booking_id'] for b in result['approved_bookings']]
+
+    assert booked_ids() == [1]
+    # Writes that bypass the booking service are not seen while cached
+    with get_db_connection() as conn:
+        conn.execute("UPDATE bookings SET status = 'cancelled' WHERE booking_id = 1")
+    assert booked_ids() == [1]
+
+    with get_db_connection() as conn:
+        conn.execute("UPDATE bookings SET status = 'approved' WHERE booking_id = 1")
+    assert update_booking_status(1, 'cancelled')['success']
+    assert booked_ids() == []
+
+
+def test_month_view_day_flags(test_db):
+    """Test today/past/selectable flags and date keys in the current month's grid."""
+    today = date.today()
+    result = prepare_calendar_data(1, [], today.year, today.month)
+    cells = [cell for week in result['calendar_data'] for cell in week if cell]
+
+    for cell in cells:
+        assert cell['date'] == today.replace(day=cell['day'])
+        assert cell['date_iso'] == cell['date'].isoformat()
+        assert cell['is_today'] == (cell['date'] == today)
+        assert cell['is_past'] == (cell['date'] < today)
+        assert cell['is_selectable'] == (cell['date'] >= today)
+
+
+def test_merge_booked_intervals():
+    """Test that overlapping and touching intervals merge and inverted ones are dropped."""
+    from src.services.calendar_service import _merge_booked_intervals
+    booked = [
+        {'start_minutes': 570, 'end_minutes': 660},
+        {'start_minutes': 540, 'end_minutes': 600},
+        {'start_minutes': 600, 'end_minutes': 630},
+        {'start_minutes': 720, 'end_minutes': 750},
+        {'start_minutes': 1380, 'end_minutes': 60},
+    ]
+    assert _merge_booked_intervals(booked) == ([540, 720], [660, 750])
+    assert _merge_booked_intervals([]) == ([], [])
+
+
+def test_adjacent_months():
+    """Test previous/next month wrapping."""
+    from src.services.calendar_service import _adjacent_months
+    assert _adjacent_months(2030, 1) == (2029, 12, 2030, 2)
+    assert _adjacent_months(2030, 6) == (2030, 5, 2030, 7)
+    assert _adjacent_months(2030, 12) == (2030, 11, 2031, 1)
@@ -4,7 +4,7 @@ Tests CRUD operations independently from Flask route handlers.
 """
 import pytest
 import os
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
 
 
 @pytest.fixture
@@ -52,6 +52,9 @@ def test_db():
     
     # Cleanup
     os.environ.pop('DATABASE_PATH', None)
+    close_all_connections()
+    if os.path.exists(test_db_path):
+        os.unlink(test_db_path)
 
 
 def test_create_user(test_db):
@@ -398,3 +401,40 @@ def test_transaction_rollback(test_db):
         # If it does exist, that's fine - SQLite doesn't enforce foreign keys by default
         # The important thing is that the transaction handling works correctly
 
+
+
+def test_connection_reused_with_wal(test_db):
+    """Test that connections are pooled and opened in WAL mode."""
+    with get_db_connection() as conn:
+        first = conn
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    
+    assert mode == 'wal'
+    
+    with get_db_connection() as conn:
+        assert conn is first
+
+
+def test_failed_block_does_not_leak_transaction(test_db):
+    """Test that a pooled connection is rolled back before reuse."""
+    with pytest.raises(Exception):
+        with get_db_connection() as conn:
+            conn.execute("""
+                INSERT INTO users (name, email, password_hash, role)
+                VALUES (?, ?, ?, ?)
+            """, ('Leak Test User', 'leak@example.com', 'hash', 'student'))
+            raise RuntimeError("abort")
+    
+    with get_db_connection() as conn:
+        assert not conn.in_transaction
+        count = conn.execute("SELECT COUNT(*) FROM users WHERE email = 'leak@example.com'").fetchone()[0]
+        assert count == 0
+
+
+def test_connection_pragmas(test_db):
+    """Test that connections wait on locks and use the tuned cache size."""
+    with get_db_connection() as conn:
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64000
+        # synchronous=NORMAL
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
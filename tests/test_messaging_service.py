@@ -0,0 +1,473 @@
+"""
+Unit tests for the messaging service.
+Tests thread IDs, thread consolidation and thread-level read status.
+"""
+import pytest
+import os
+import subprocess
+import sys
+from src.services.messaging_service import generate_thread_id
+from src.data_access.database import get_db_connection, close_all_connections
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database with the full schema and three users."""
+    import tempfile
+    import uuid
+    from init_db import init_database
+    test_db_path = os.path.join(tempfile.gettempdir(), f'test_{uuid.uuid4().hex}.db')
+    os.environ['DATABASE_PATH'] = test_db_path
+    init_database()
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for name in ('Alice', 'Bob', 'Carol'):
+            cursor.execute("INSERT INTO users (name, email, password_hash, role) VALUES (?, ?, ?, ?)",
+                          (name, f'{name.lower()}@example.com', 'hash', 'student'))
+        cursor.execute("""
+            INSERT INTO resources (owner_id, title, category, location, status)
+            VALUES (2, 'Study Room', 'study_room', 'Library', 'published')
+        """)
+        conn.commit()
+
+    yield test_db_path
+
+    os.environ.pop('DATABASE_PATH', None)
+    close_all_connections()
+    if os.path.exists(test_db_path):
+        os.unlink(test_db_path)
+
+
+def user_id(name):
+    """Look up a test user's ID by name."""
+    with get_db_connection() as conn:
+        return conn.execute("SELECT user_id FROM users WHERE name = ?", (name,)).fetchone()['user_id']
+
+
+def test_generate_thread_id_is_stable_across_processes():
+    """Test that thread IDs don't depend on the per-process string hash seed."""
+    code = "from src.services.messaging_service import generate_thread_id; print(generate_thread_id(7, 3, 5))"
+    outputs = {
+        subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                       env={**os.environ, 'PYTHONHASHSEED': seed}).stdout.strip()
+        for seed in ('1', '2')
+    }
+    assert outputs == {str(generate_thread_id(3, 7, 5))}
+
+
+def test_generate_thread_id_separates_resources():
+    """Test that thread IDs are order-independent but distinct per resource."""
+    assert generate_thread_id(1, 2, 5) == generate_thread_id(2, 1, 5)
+    assert generate_thread_id(1, 2, 5) != generate_thread_id(1, 2, 6)
+    assert generate_thread_id(1, 2) != generate_thread_id(1, 2, 0)
+    assert 0 <= generate_thread_id(1, 2) < 10 ** 10
+
+
+def test_init_database_backfills_legacy_thread_ids(test_db):
+    """Test that re-running init_database moves legacy thread IDs and their read status."""
+    from init_db import init_database
+    alice, bob = user_id('Alice'), user_id('Bob')
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for legacy_id in (111, 222):
+            cursor.execute("""
+                INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id)
+                VALUES (?, ?, ?, 'hi', 1)
+            """, (legacy_id, alice, bob))
+        cursor.execute("INSERT INTO thread_read (user_id, thread_id, is_read) VALUES (?, 111, 1)", (bob,))
+        cursor.execute("INSERT INTO thread_read (user_id, thread_id, is_read) VALUES (?, 222, 0)", (bob,))
+        conn.commit()
+
+    init_database()
+
+    expected = generate_thread_id(alice, bob, 1)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        thread_ids = {row['thread_id'] for row in cursor.execute("SELECT thread_id FROM messages")}
+        read_rows = cursor.execute("SELECT thread_id, is_read FROM thread_read WHERE user_id = ?",
+                                   (bob,)).fetchall()
+    assert thread_ids == {expected}
+    assert [(row['thread_id'], row['is_read']) for row in read_rows] == [(expected, 0)]
+
+
+def test_list_threads_consolidates_and_tracks_read_status(test_db):
+    """Test that threads group by (other user, resource) with latest message and unread flag."""
+    from src.services.messaging_service import send_message, list_threads, get_thread_messages
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    send_message(bob, alice, 'About the room', resource_id=1)
+    send_message(carol, alice, 'Hello')
+    # A legacy thread_id for the same conversation as the first message
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id)
+            VALUES (42, ?, ?, 'Still free?', 1)
+        """, (bob, alice))
+    with get_db_connection() as conn:
+        conn.execute("UPDATE users SET deleted = 1 WHERE user_id = ?", (carol,))
+
+    threads = list_threads(alice)['data']['threads']
+    by_user = {t['other_user_id']: t for t in threads}
+    assert len(threads) == 2
+    assert by_user[bob]['last_message'] == 'Still free?'
+    assert by_user[bob]['thread_id'] == 42
+    assert by_user[bob]['other_user_name'] == 'Bob'
+    assert by_user[bob]['resource_title'] == 'Study Room'
+    assert by_user[carol]['other_user_name'] == '[Deleted User]'
+    assert 'resource_title' not in by_user[carol]
+    assert all(t['is_unread'] for t in threads)
+
+    # Opening the thread marks every thread_id in the conversation as read
+    assert get_thread_messages(42, alice)['success']
+    by_user = {t['other_user_id']: t for t in list_threads(alice)['data']['threads']}
+    assert by_user[bob]['is_unread'] is False
+    assert by_user[carol]['is_unread'] is True
+
+
+def test_get_thread_messages_spans_legacy_thread_ids(test_db):
+    """Test that opening a thread returns the whole conversation and checks access."""
+    from src.services.messaging_service import send_message, get_thread_messages
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    thread_id = send_message(bob, alice, 'First', resource_id=1)['data']['thread_id']
+    send_message(alice, bob, 'Other resource')
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id)
+            VALUES (42, ?, ?, 'Second', 1)
+        """, (alice, bob))
+
+    result = get_thread_messages(thread_id, alice)
+    assert [m['content'] for m in result['data']['messages']] == ['First', 'Second']
+    assert 'user_a_id' not in result['data']['messages'][0]
+    assert result['data']['messages'][0]['booking_id'] is None
+    assert get_thread_messages(thread_id, carol)['success'] is False
+    assert get_thread_messages(12345, alice)['success'] is False
+
+
+def test_list_threads_unread_if_any_thread_id_unread(test_db):
+    """Test that a conversation with one read and one unread thread_id is unread."""
+    from src.services.messaging_service import send_message, list_threads, _invalidate_thread_caches
+    alice, bob = user_id('Alice'), user_id('Bob')
+    thread_id = send_message(bob, alice, 'First', resource_id=1)['data']['thread_id']
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO messages (thread_id, sender_id, receiver_id, content, resource_id)
+            VALUES (42, ?, ?, 'Second', 1)
+        """, (bob, alice))
+        cursor.execute("UPDATE thread_read SET is_read = 1 WHERE thread_id = ?", (thread_id,))
+        cursor.execute("INSERT INTO thread_read (user_id, thread_id, is_read) VALUES (?, 42, 0)", (alice,))
+
+    assert list_threads(alice)['data']['threads'][0]['is_unread'] is True
+    with get_db_connection() as conn:
+        conn.execute("UPDATE thread_read SET is_read = 1 WHERE thread_id = 42")
+    # Written behind the messaging service's back, so drop its cached thread list
+    _invalidate_thread_caches(alice)
+    assert list_threads(alice)['data']['threads'][0]['is_unread'] is False
+
+
+def test_get_deleted_threads(test_db):
+    """Test that deleted conversations are listed with names, resource and counts for admins."""
+    from src.services.messaging_service import send_message, delete_thread, get_deleted_threads
+    admin, alice, bob, carol = user_id('Admin User'), user_id('Alice'), user_id('Bob'), user_id('Carol')
+    send_message(bob, alice, 'First', resource_id=1)
+    thread_id = send_message(alice, bob, 'Reply', resource_id=1)['data']['thread_id']
+    other_thread_id = send_message(carol, alice, 'Hello')['data']['thread_id']
+    assert delete_thread(thread_id, alice)['data']['deleted_count'] == 2
+
+    assert get_deleted_threads(alice)['success'] is False
+    result = get_deleted_threads(admin)['data']
+    assert result['total'] == 1
+    thread = result['threads'][0]
+    assert (thread['user1_name'], thread['user2_name']) == ('Alice', 'Bob')
+    assert thread['resource_title'] == 'Study Room'
+    assert thread['deleted_count'] == 2
+    assert thread['last_message'] == 'Reply'
+
+    delete_thread(other_thread_id, carol)
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM users WHERE user_id = ?", (carol,))
+    result = get_deleted_threads(admin)['data']
+    assert result['total'] == 2
+    by_thread = {t['thread_id']: t for t in result['threads']}
+    assert by_thread[other_thread_id]['user2_name'] == '[Deleted User]'
+    assert by_thread[other_thread_id]['resource_title'] is None
+    assert by_thread[other_thread_id]['deleted_count'] == 1
+    assert get_deleted_threads(admin, limit=1, offset=1)['data']['threads'][0] == result['threads'][1]
+
+
+def test_init_database_adds_pair_columns_to_existing_messages():
+    """Test that an existing messages table gains the generated participant pair columns."""
+    import sqlite3
+    import tempfile
+    import uuid
+    from init_db import init_database
+    test_db_path = os.path.join(tempfile.gettempdir(), f'test_{uuid.uuid4().hex}.db')
+    os.environ['DATABASE_PATH'] = test_db_path
+    try:
+        conn = sqlite3.connect(test_db_path)
+        conn.execute("""
+            CREATE TABLE messages (
+                message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id INTEGER NOT NULL,
+                sender_id INTEGER NOT NULL,
+                receiver_id INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                read BOOLEAN DEFAULT 0,
+                deleted BOOLEAN DEFAULT 0,
+                resource_id INTEGER,
+                booking_id INTEGER
+            )
+        """)
+        conn.execute("INSERT INTO messages (thread_id, sender_id, receiver_id, content) VALUES (1, 9, 4, 'hi')")
+        conn.commit()
+        conn.close()
+
+        init_database()
+        init_database()
+
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT user_a_id, user_b_id FROM messages").fetchone()
+        assert (row['user_a_id'], row['user_b_id']) == (4, 9)
+    finally:
+        os.environ.pop('DATABASE_PATH', None)
+        close_all_connections()
+        if os.path.exists(test_db_path):
+            os.unlink(test_db_path)
+
+
+def test_init_database_rebuilds_thread_read_without_rowid():
+    """Test that an existing rowid thread_read table is rebuilt keyed by (user_id, thread_id)."""
+    import sqlite3
+    import tempfile
+    import uuid
+    from init_db import init_database
+    test_db_path = os.path.join(tempfile.gettempdir(), f'test_{uuid.uuid4().hex}.db')
+    os.environ['DATABASE_PATH'] = test_db_path
+    try:
+        conn = sqlite3.connect(test_db_path)
+        conn.execute("""
+            CREATE TABLE thread_read (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                thread_id INTEGER NOT NULL,
+                is_read BOOLEAN DEFAULT 0,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, thread_id)
+            )
+        """)
+        conn.execute("INSERT INTO thread_read (user_id, thread_id, is_read, updated_at) VALUES (4, 7, 1, '2025-01-01 00:00:00')")
+        conn.commit()
+        conn.close()
+
+        init_database()
+        init_database()
+
+        with get_db_connection() as conn:
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'thread_read'").fetchone()['sql']
+            rows = [tuple(row) for row in conn.execute("SELECT * FROM thread_read")]
+        assert 'WITHOUT ROWID' in sql
+        assert rows == [(4, 7, 1, '2025-01-01 00:00:00')]
+    finally:
+        os.environ.pop('DATABASE_PATH', None)
+        close_all_connections()
+        if os.path.exists(test_db_path):
+            os.unlink(test_db_path)
+
+
+def test_mark_thread_read_and_unread(test_db):
+    """Test that thread read status can be toggled and is reset by a new message."""
+    from src.services.messaging_service import send_message, mark_thread_read, mark_thread_unread, list_threads
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    thread_id = send_message(bob, alice, 'Hi')['data']['thread_id']
+
+    def is_unread():
+        return list_threads(alice)['data']['threads'][0]['is_unread']
+
+    assert is_unread() is True
+    assert mark_thread_read(thread_id, alice)['success']
+    assert is_unread() is False
+    assert mark_thread_unread(thread_id, alice)['success']
+    assert is_unread() is True
+    assert mark_thread_read(thread_id, alice)['success']
+    send_message(bob, alice, 'Again')
+    assert is_unread() is True
+    assert mark_thread_read(thread_id, carol)['success'] is False
+
+
+def test_mark_thread_read_twice_keeps_status_time(test_db):
+    """Test that re-marking a thread with its current status succeeds without touching updated_at."""
+    from src.services.messaging_service import send_message, mark_thread_read, mark_thread_unread
+    alice, bob = user_id('Alice'), user_id('Bob')
+    thread_id = send_message(bob, alice, 'Hi')['data']['thread_id']
+    assert mark_thread_read(thread_id, alice)['success']
+    with get_db_connection() as conn:
+        conn.execute("UPDATE thread_read SET updated_at = '2000-01-01 00:00:00'")
+
+    assert mark_thread_read(thread_id, alice)['success']
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT is_read, updated_at FROM thread_read WHERE user_id = ?", (alice,)).fetchone()
+    assert (row['is_read'], row['updated_at']) == (1, '2000-01-01 00:00:00')
+
+    assert mark_thread_unread(thread_id, alice)['success']
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT is_read, updated_at FROM thread_read WHERE user_id = ?", (alice,)).fetchone()
+    assert row['is_read'] == 0
+    assert row['updated_at'] != '2000-01-01 00:00:00'
+    assert mark_thread_unread(thread_id + 1, alice)['success'] is False
+
+
+def test_list_threads_is_cached_until_messaging_changes_it(test_db):
+    """Test that the full thread list is cached, copied per call and refreshed by messaging writes."""
+    from src.services.messaging_service import send_message, list_threads, mark_thread_read
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    thread_id = send_message(bob, alice, 'One')['data']['thread_id']
+    threads = list_threads(alice)['data']['threads']
+    threads[0]['last_message'] = 'Changed by caller'
+
+    with get_db_connection() as conn:
+        conn.execute("UPDATE messages SET content = 'Edited'")
+    assert list_threads(alice)['data']['threads'][0]['last_message'] == 'One'
+    assert list_threads(alice, limit=10)['data']['threads'][0]['last_message'] == 'Edited'
+
+    mark_thread_read(thread_id, alice)
+    assert list_threads(alice)['data']['threads'][0]['is_unread'] is False
+    send_message(carol, alice, 'Two')
+    assert {t['last_message'] for t in list_threads(alice)['data']['threads']} == {'Two', 'Edited'}
+
+
+def test_get_unread_count(test_db):
+    """Test that unread threads are counted once each and drop out when read or deleted."""
+    from src.services.messaging_service import send_message, get_unread_count, mark_thread_read, delete_thread
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    first = send_message(bob, alice, 'One')['data']['thread_id']
+    send_message(bob, alice, 'Two')
+    second = send_message(carol, alice, 'Hello', resource_id=1)['data']['thread_id']
+    assert get_unread_count(alice) == 2
+
+    mark_thread_read(first, alice)
+    assert get_unread_count(alice) == 1
+    delete_thread(second, alice)
+    assert get_unread_count(alice) == 0
+
+
+def test_get_unread_count_is_cached_until_messaging_changes_it(test_db):
+    """Test that unread counts are cached and refreshed by the writes that change them."""
+    from src.services.messaging_service import send_message, get_unread_count, mark_thread_unread
+    alice, bob = user_id('Alice'), user_id('Bob')
+    thread_id = send_message(bob, alice, 'One')['data']['thread_id']
+    assert get_unread_count(alice) == 1
+
+    # Writes outside the messaging service aren't seen until the entry expires
+    with get_db_connection() as conn:
+        conn.execute("UPDATE thread_read SET is_read = 1 WHERE user_id = ?", (alice,))
+    assert get_unread_count(alice) == 1
+
+    mark_thread_unread(thread_id, alice)
+    assert get_unread_count(alice) == 1
+    send_message(bob, alice, 'Two', resource_id=1)
+    assert get_unread_count(alice) == 2
+
+
+def test_send_message_leaves_unread_status_row_alone(test_db):
+    """Test that messages arriving in an already-unread thread don't rewrite its status row."""
+    from src.services.messaging_service import send_message, mark_thread_read
+    alice, bob = user_id('Alice'), user_id('Bob')
+    thread_id = send_message(bob, alice, 'One')['data']['thread_id']
+    with get_db_connection() as conn:
+        conn.execute("UPDATE thread_read SET updated_at = '2000-01-01 00:00:00'")
+
+    send_message(bob, alice, 'Two')
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT is_read, updated_at FROM thread_read WHERE user_id = ?", (alice,)).fetchone()
+    assert (row['is_read'], row['updated_at']) == (0, '2000-01-01 00:00:00')
+
+    mark_thread_read(thread_id, alice)
+    send_message(bob, alice, 'Three')
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT is_read, updated_at FROM thread_read WHERE user_id = ?", (alice,)).fetchone()
+    assert row['is_read'] == 0
+    assert row['updated_at'] != '2000-01-01 00:00:00'
+
+
+def test_get_thread_messages_pages_backwards(test_db):
+    """Test keyset pagination over a conversation, newest page first."""
+    from src.services.messaging_service import send_message, get_thread_messages, list_threads
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    for n in range(5):
+        thread_id = send_message(bob, alice, f'm{n}')['data']['thread_id']
+
+    page = get_thread_messages(thread_id, alice, limit=2)['data']
+    assert [m['content'] for m in page['messages']] == ['m3', 'm4']
+    assert page['has_more'] is True
+    assert list_threads(alice)['data']['threads'][0]['is_unread'] is False
+
+    older = get_thread_messages(thread_id, alice, limit=2, before_message_id=page['messages'][0]['message_id'])['data']
+    assert [m['content'] for m in older['messages']] == ['m1', 'm2']
+    oldest = get_thread_messages(thread_id, alice, limit=2, before_message_id=older['messages'][0]['message_id'])['data']
+    assert [m['content'] for m in oldest['messages']] == ['m0']
+    assert oldest['has_more'] is False
+
+    empty = get_thread_messages(thread_id, alice, limit=2, before_message_id=oldest['messages'][0]['message_id'])
+    assert empty['success'] and empty['data']['messages'] == []
+    assert get_thread_messages(thread_id, carol, limit=2)['success'] is False
+
+
+def test_list_threads_limit_offset(test_db):
+    """Test that thread lists can be paged."""
+    from src.services.messaging_service import send_message, list_threads
+    alice, bob, carol = user_id('Alice'), user_id('Bob'), user_id('Carol')
+    send_message(bob, alice, 'Room', resource_id=1)
+    send_message(bob, alice, 'General')
+    send_message(carol, alice, 'Hi')
+
+    everything = list_threads(alice)['data']['threads']
+    assert len(everything) == 3
+    assert list_threads(alice, limit=2)['data']['threads'] == everything[:2]
+    assert list_threads(alice, limit=2, offset=2)['data']['threads'] == everything[2:]
+
+
+def test_search_users_for_messaging_matches_substrings(test_db):
+    """Test that user search matches name and email substrings and follows renames."""
+    from src.services.messaging_service import search_users_for_messaging
+    alice = user_id('Alice')
+
+    def names(search):
+        return [user['name'] for user in search_users_for_messaging(alice, search=search)['data']['users']]
+
+    assert names('ob') == ['Bob']
+    assert names('ARO') == ['Carol']
+    assert names('@example.com') == ['Bob', 'Carol']
+    assert names('lic') == []
+    assert names('"bob') == []
+
+    with get_db_connection() as conn:
+        conn.execute("UPDATE users SET name = 'Robert', email = 'robert@example.com' WHERE name = 'Bob'")
+    assert names('robe') == ['Robert']
+    assert names('Bob') == []
+
+
+def test_get_existing_thread_id(test_db):
+    """Test that an existing conversation is found from either side and per resource."""
+    from src.services.messaging_service import send_message, get_existing_thread_id, delete_thread
+    alice, bob = user_id('Alice'), user_id('Bob')
+    assert get_existing_thread_id(alice, bob) is None
+
+    thread_id = send_message(bob, alice, 'Hi')['data']['thread_id']
+    assert get_existing_thread_id(alice, bob) == thread_id
+    assert get_existing_thread_id(bob, alice) == thread_id
+    assert get_existing_thread_id(alice, bob, resource_id=1) is None
+
+    # Another conversation stored under the same thread ID is not mistaken for this one
+    carol = user_id('Carol')
+    collided = generate_thread_id(alice, carol)
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO messages (thread_id, sender_id, receiver_id, content)
+            VALUES (?, ?, ?, 'Not yours')
+        """, (collided, bob, carol))
+    assert get_existing_thread_id(alice, carol) is None
+
+    delete_thread(thread_id, alice)
+    assert get_existing_thread_id(alice, bob) is None
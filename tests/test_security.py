@@ -3,7 +3,7 @@ Security tests for SQL injection and XSS prevention.
 """
 import pytest
 from app import app
-from src.data_access.database import get_db_connection
+from src.data_access.database import get_db_connection, close_all_connections
 from src.services.resource_service import create_resource, get_resource
 import os
 import tempfile
@@ -72,6 +72,7 @@ def client():
     
     # Cleanup - ensure database is deleted
     os.close(db_fd)
+    close_all_connections()
     if os.path.exists(db_path):
         try:
             os.unlink(db_path)